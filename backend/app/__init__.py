@@ -9,11 +9,15 @@ from sqlalchemy.engine import Engine
 from flask_cors import CORS
 
 from . import models
+from app.hashing import init_hash_pool
 from app.limiter import limiter
+from app.security_logger import init_security_log
 from app.routes.habits import habits_bp
 from app.routes.progress import progress_bp
 from app.routes.stats import stats_bp
 from app.routes.auth import auth_bp
+from app.routes.dashboard import dashboard_bp
+from app.routes.health import health_bp
 
 
 db = models.db
@@ -89,11 +93,15 @@ def create_app(configs = None):
     db.init_app(app)
     migrate.init_app(app, db)
     limiter.init_app(app)
+    init_hash_pool(app)
+    init_security_log(app)
 
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(habits_bp, url_prefix="/api/habits")
     app.register_blueprint(progress_bp, url_prefix="/api/progress")
     app.register_blueprint(stats_bp, url_prefix="/api/stats")
+    app.register_blueprint(dashboard_bp, url_prefix="/api/dashboard")
+    app.register_blueprint(health_bp, url_prefix="/api/health")
 
     return app
 
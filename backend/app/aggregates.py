@@ -0,0 +1,575 @@
+"""Per-period progress aggregates and the values derived from them.
+
+`HabitPeriodTotal` holds one pre-summed row per habit and period. Progress
+writes update it in the same transaction as the entries themselves, so
+completion and streak calculations read O(periods) rows instead of every
+ProgressEntry.
+"""
+
+from datetime import date
+from typing import Sequence
+
+from sqlalchemy import and_, case, func, or_, select, type_coerce
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.enums import HabitFrequency, HabitType
+from app.models import db, Habit, HabitPeriodTotal, ProgressEntry
+from app.periods import get_calendar, period_ordinal
+from app.redis_client import (
+    get_cached_streaks,
+    invalidate_streak_caches,
+    set_cached_streaks,
+)
+from app.streaks import (
+    StreakState,
+    advance_streak_state,
+    apply_period_total,
+    build_streak_state,
+    calculate_best_streak,
+    is_period_successful,
+    sum_by_period,
+)
+from app.utils import calculate_streak
+
+
+def period_start_expression(column, frequency: HabitFrequency):
+    """
+    SQL expression for the start of the period containing a date column.
+
+    Matches `PeriodCalendar.period_start` on both MySQL and SQLite, so rows can be grouped
+    by period inside the database.
+    """
+    if db.session.get_bind().dialect.name == "mysql":
+        match frequency:
+            case HabitFrequency.DAILY:
+                return column
+            case HabitFrequency.WEEKLY:
+                # WEEKDAY() is 0 on Mondays
+                return type_coerce(func.subdate(column, func.weekday(column)), db.Date)
+            case HabitFrequency.MONTHLY:
+                return type_coerce(func.subdate(column, func.dayofmonth(column) - 1), db.Date)
+            case HabitFrequency.YEARLY:
+                return type_coerce(func.makedate(func.year(column), 1), db.Date)
+    else:
+        match frequency:
+            case HabitFrequency.DAILY:
+                return column
+            case HabitFrequency.WEEKLY:
+                # Forward to the week's Sunday, then back to its Monday
+                return type_coerce(func.date(column, "weekday 0", "-6 days"), db.Date)
+            case HabitFrequency.MONTHLY:
+                return type_coerce(func.date(column, "start of month"), db.Date)
+            case HabitFrequency.YEARLY:
+                return type_coerce(func.date(column, "start of year"), db.Date)
+    raise ValueError(f"Unknown habit frequency {frequency}")
+
+
+def habit_period_start_expression(column):
+    """Period start expression that follows each joined Habit's own frequency."""
+    return case(
+        *[
+            (Habit.frequency == frequency, period_start_expression(column, frequency))
+            for frequency in HabitFrequency
+        ]
+    )
+
+
+def current_period_condition(column, reference_date: date | None = None):
+    """
+    SQL condition matching dates in the current period of each joined Habit.
+
+    Windows are computed in Python, one per frequency, so the comparison can
+    use the index on the date column.
+    """
+    if reference_date is None:
+        reference_date = date.today()
+
+    windows = []
+    for frequency in HabitFrequency:
+        start, end = get_calendar(frequency).period_range(reference_date)
+        windows.append(and_(Habit.frequency == frequency, column >= start, column < end))
+    return or_(*windows)
+
+
+def period_total(habit: Habit, day: date) -> float:
+    """Sum of a habit's progress in the period containing `day`."""
+    start = get_calendar(habit.frequency).period_start(day)
+    total = db.session.execute(
+        select(HabitPeriodTotal.total).where(
+            HabitPeriodTotal.habit_id == habit.id,
+            HabitPeriodTotal.period_start == start,
+        )
+    ).scalar()
+    return total or 0
+
+
+def period_totals(habit: Habit) -> dict[int, float]:
+    """Progress totals of a habit keyed by period ordinal."""
+    return sum_by_period(habit, load_period_totals([habit.id])[habit.id])
+
+
+def load_period_totals(habit_ids: Sequence[int]) -> dict[int, list]:
+    """
+    Load the period totals of several habits in one query.
+
+    Rows expose `date` (the period start) and `value` (the total), so they can
+    be passed anywhere a list of progress entries is expected.
+
+    Returns:
+        Dictionary mapping habit_id to its rows, newest period first.
+    """
+    rows = db.session.execute(
+        select(
+            HabitPeriodTotal.habit_id,
+            HabitPeriodTotal.period_start.label("date"),
+            HabitPeriodTotal.total.label("value"),
+        )
+        .where(HabitPeriodTotal.habit_id.in_(habit_ids))
+        .order_by(HabitPeriodTotal.period_start.desc())
+    ).all()
+
+    result: dict[int, list] = {habit_id: [] for habit_id in habit_ids}
+    for row in rows:
+        result[row.habit_id].append(row)
+    return result
+
+
+def load_current_period_totals(
+    habits: Sequence[Habit], reference_date: date | None = None
+) -> dict[int, float]:
+    """Progress total of each habit's current period, in one query."""
+    if reference_date is None:
+        reference_date = date.today()
+
+    current_starts = {
+        habit.id: get_calendar(habit.frequency).period_start(reference_date) for habit in habits
+    }
+    rows = db.session.execute(
+        select(
+            HabitPeriodTotal.habit_id,
+            HabitPeriodTotal.period_start,
+            HabitPeriodTotal.total,
+        ).where(
+            HabitPeriodTotal.habit_id.in_(current_starts.keys()),
+            HabitPeriodTotal.period_start.in_(set(current_starts.values())),
+        )
+    ).all()
+
+    result = {habit.id: 0 for habit in habits}
+    for row in rows:
+        # Starts are shared across frequencies, so match each row to its own habit's period
+        if row.period_start == current_starts[row.habit_id]:
+            result[row.habit_id] = row.total
+    return result
+
+
+def load_completion_rates(
+    habits: Sequence[Habit], reference_date: date | None = None
+) -> dict[int, dict]:
+    """
+    Share of successful periods since each habit's start date, in one query.
+
+    Ended periods are counted in the database; only periods with a stored
+    total are read, and periods without one are successful exactly when an
+    empty total is. The present period only counts once it has succeeded, so
+    an unfinished period does not lower the rate.
+
+    Returns:
+        Dictionary mapping habit_id to successful_periods, total_periods
+        and percentage.
+    """
+    if reference_date is None:
+        reference_date = date.today()
+    if not habits:
+        return {}
+
+    present_start = case(
+        *[
+            (Habit.frequency == frequency, get_calendar(frequency).period_start(reference_date))
+            for frequency in HabitFrequency
+        ]
+    )
+    ended = HabitPeriodTotal.period_start < present_start
+    successful = or_(
+        and_(Habit.type == HabitType.ABOVE, HabitPeriodTotal.total >= Habit.target_value),
+        and_(Habit.type == HabitType.BELOW, HabitPeriodTotal.total <= Habit.target_value),
+    )
+    rows = db.session.execute(
+        select(
+            HabitPeriodTotal.habit_id,
+            func.sum(case((ended, 1), else_=0)).label("recorded"),
+            func.sum(case((and_(ended, successful), 1), else_=0)).label("successes"),
+            func.sum(
+                case((HabitPeriodTotal.period_start == present_start, HabitPeriodTotal.total), else_=0)
+            ).label("current_total"),
+        )
+        .join(Habit, Habit.id == HabitPeriodTotal.habit_id)
+        .where(
+            HabitPeriodTotal.habit_id.in_([habit.id for habit in habits]),
+            HabitPeriodTotal.period_start >= habit_period_start_expression(Habit.start_date),
+        )
+        .group_by(HabitPeriodTotal.habit_id)
+    ).all()
+    by_habit = {row.habit_id: row for row in rows}
+
+    result = {}
+    for habit in habits:
+        calendar = get_calendar(habit.frequency)
+        present = calendar.ordinal(reference_date)
+        first = calendar.ordinal(habit.start_date)
+        row = by_habit.get(habit.id)
+        recorded = row.recorded if row else 0
+        successes = row.successes if row else 0
+        current_total = row.current_total if row else 0
+
+        total_periods = max(present - first, 0)
+        if is_period_successful(habit, 0):
+            successful_periods = total_periods - (recorded - successes)
+        else:
+            successful_periods = successes
+        if present >= first and is_period_successful(habit, current_total):
+            successful_periods += 1
+            total_periods += 1
+
+        result[habit.id] = {
+            "successful_periods": successful_periods,
+            "total_periods": total_periods,
+            "percentage": (
+                round(successful_periods / total_periods * 100, 1) if total_periods else 0.0
+            ),
+        }
+    return result
+
+
+def load_trend_totals(
+    habit: Habit, frequency: HabitFrequency, start: date, end: date
+) -> dict[date, float]:
+    """
+    Sum a habit's progress per period of `frequency`, grouped in the database.
+
+    Args:
+        habit: The Habit object
+        frequency: Bucket size; need not match the habit's own frequency
+        start: First day included
+        end: First day excluded
+
+    Returns:
+        Dictionary mapping period start to total, for periods with entries.
+    """
+    bucket = period_start_expression(ProgressEntry.date, frequency).label("period_start")
+    rows = db.session.execute(
+        select(bucket, func.sum(ProgressEntry.value).label("total"))
+        .where(
+            ProgressEntry.habit_id == habit.id,
+            ProgressEntry.date >= start,
+            ProgressEntry.date < end,
+        )
+        .group_by(bucket)
+    ).all()
+    return {row.period_start: row.total for row in rows}
+
+
+def _upsert_period_totals(rows: list[dict]) -> None:
+    """
+    Atomically add to period totals, creating rows as needed.
+
+    Each row holds habit_id, period_start, total and entry_count deltas; all
+    rows go to the database in one executemany.
+    """
+    if db.session.get_bind().dialect.name == "mysql":
+        stmt = mysql_insert(HabitPeriodTotal)
+        stmt = stmt.on_duplicate_key_update(
+            total=HabitPeriodTotal.total + stmt.inserted.total,
+            entry_count=HabitPeriodTotal.entry_count + stmt.inserted.entry_count,
+        )
+    else:
+        stmt = sqlite_insert(HabitPeriodTotal)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[HabitPeriodTotal.habit_id, HabitPeriodTotal.period_start],
+            set_={
+                "total": HabitPeriodTotal.total + stmt.excluded.total,
+                "entry_count": HabitPeriodTotal.entry_count + stmt.excluded.entry_count,
+            },
+        )
+    db.session.execute(stmt, rows)
+
+
+def _apply_period_changes(habit: Habit, changes: dict[date, tuple[float, int]]) -> dict[date, float]:
+    """
+    Add (delta, count_delta) to each of a habit's periods, keyed by period start.
+
+    Returns:
+        Dictionary mapping each touched period start to its new total.
+    """
+    starts = list(changes)
+    _upsert_period_totals([
+        {"habit_id": habit.id, "period_start": start, "total": delta, "entry_count": count_delta}
+        for start, (delta, count_delta) in changes.items()
+    ])
+    if any(count_delta < 0 for _, count_delta in changes.values()):
+        # Rows disappear with their last entry
+        db.session.execute(
+            HabitPeriodTotal.__table__.delete().where(
+                HabitPeriodTotal.habit_id == habit.id,
+                HabitPeriodTotal.period_start.in_(starts),
+                HabitPeriodTotal.entry_count <= 0,
+            )
+        )
+    # Read back inside the transaction so concurrent writers see each other's totals
+    stored = dict(
+        db.session.execute(
+            select(HabitPeriodTotal.period_start, HabitPeriodTotal.total).where(
+                HabitPeriodTotal.habit_id == habit.id,
+                HabitPeriodTotal.period_start.in_(starts),
+            )
+        ).all()
+    )
+    new_totals = {start: stored.get(start, 0) for start in starts}
+
+    # The best streak only changes when a touched period flips between
+    # success and failure; only then are the period aggregates rescanned.
+    calendar = get_calendar(habit.frequency)
+    first = calendar.ordinal(habit.start_date)
+    flipped = any(
+        is_period_successful(habit, new_totals[start] - delta) != is_period_successful(habit, new_totals[start])
+        for start, (delta, _) in changes.items()
+        if calendar.ordinal(start) >= first
+    )
+    if flipped or (habit.best_streak is None and calendar.ordinal(max(starts)) >= first):
+        habit.best_streak = calculate_best_streak(habit, period_totals(habit))
+
+    return new_totals
+
+
+def _apply_progress_change(
+    habit: Habit, day: date, delta: float, count_delta: int
+) -> tuple[date, float]:
+    start = get_calendar(habit.frequency).period_start(day)
+    return start, _apply_period_changes(habit, {start: (delta, count_delta)})[start]
+
+
+def record_progress_added(habit: Habit, day: date, value: float) -> tuple[date, float]:
+    """
+    Update a habit's aggregates for a new progress entry.
+
+    Runs in the caller's transaction; commit together with the entry.
+
+    Returns:
+        Tuple of (period_start, new_total) for the touched period.
+    """
+    return _apply_progress_change(habit, day, value, 1)
+
+
+def record_progress_removed(habit: Habit, day: date, value: float) -> tuple[date, float]:
+    """
+    Update a habit's aggregates for a deleted progress entry.
+
+    Runs in the caller's transaction; commit together with the deletion.
+
+    Returns:
+        Tuple of (period_start, new_total) for the touched period.
+    """
+    return _apply_progress_change(habit, day, -value, -1)
+
+
+def _sum_changes_by_period(
+    habit: Habit, entries: Sequence[tuple[date, float]], sign: int
+) -> dict[date, tuple[float, int]]:
+    calendar = get_calendar(habit.frequency)
+    changes: dict[date, tuple[float, int]] = {}
+    for day, value in entries:
+        start = calendar.period_start(day)
+        delta, count = changes.get(start, (0, 0))
+        changes[start] = (delta + sign * value, count + sign)
+    return changes
+
+
+def record_progress_batch_added(habit: Habit, entries: Sequence[tuple[date, float]]) -> dict[date, float]:
+    """
+    Update a habit's aggregates for several new progress entries at once.
+
+    Entries are summed per period first, so each touched period is written
+    once. Runs in the caller's transaction; commit together with the entries.
+
+    Args:
+        habit: The Habit object
+        entries: (date, value) pairs
+
+    Returns:
+        Dictionary mapping each touched period start to its new total.
+    """
+    return _apply_period_changes(habit, _sum_changes_by_period(habit, entries, 1))
+
+
+def record_progress_batch_removed(habit: Habit, entries: Sequence[tuple[date, float]]) -> dict[date, float]:
+    """
+    Update a habit's aggregates for several deleted progress entries at once.
+
+    The counterpart of `record_progress_batch_added`; commit together with
+    the deletion.
+    """
+    return _apply_period_changes(habit, _sum_changes_by_period(habit, entries, -1))
+
+
+def get_streak_states(habits: Sequence[Habit]) -> dict[int, StreakState]:
+    """
+    Cached streak states of several habits, rolled forward to the present period.
+
+    Uses one cache round trip; habits without a usable state are left out.
+    """
+    cached = get_cached_streaks([habit.id for habit in habits])
+
+    states = {}
+    advanced_states = {}
+    for habit in habits:
+        if habit.id not in cached:
+            continue
+        try:
+            state = StreakState.from_dict(cached[habit.id])
+        except (KeyError, TypeError, ValueError):
+            continue
+
+        advanced = advance_streak_state(habit, state)
+        if advanced is None:
+            continue
+        if advanced is not state:
+            advanced_states[habit.id] = advanced.to_dict()
+        states[habit.id] = advanced
+
+    set_cached_streaks(advanced_states)
+    return states
+
+
+def get_streak_state(habit: Habit) -> StreakState | None:
+    """Cached streak state of a habit, rolled forward to the present period."""
+    return get_streak_states([habit]).get(habit.id)
+
+
+def load_streaks(habits: Sequence[Habit]) -> tuple[dict[int, int], dict[int, int]]:
+    """
+    Current and best streaks of several habits.
+
+    Cached streak states are checked for every habit at once; period totals
+    are only loaded, in one query, for habits that missed the cache or have
+    no stored best streak. Newly calculated best streaks are set on the
+    habits; commit them in the caller.
+
+    Returns:
+        Tuple of (streaks, best_streaks), each keyed by habit_id.
+    """
+    states = get_streak_states(habits)
+    misses = [habit for habit in habits if habit.id not in states or habit.best_streak is None]
+    grouped_totals = load_period_totals([habit.id for habit in misses]) if misses else {}
+
+    new_states = {}
+    for habit in misses:
+        rows = grouped_totals[habit.id]
+
+        # Best streak is stored with the habit; only fill it in if it was never calculated
+        if habit.best_streak is None:
+            habit.best_streak = calculate_best_streak(habit, sum_by_period(habit, rows))
+
+        if habit.id not in states:
+            # Cache miss - calculate and cache with the state needed to update it on writes
+            streak = calculate_streak(habit, rows)
+            present_start = get_calendar(habit.frequency).period_start(date.today())
+            current_total = next((row.value for row in rows if row.date == present_start), 0)
+            states[habit.id] = build_streak_state(habit, streak, current_total)
+            new_states[habit.id] = states[habit.id].to_dict()
+
+    set_cached_streaks(new_states)
+
+    streaks = {}
+    best_streaks = {}
+    for habit in habits:
+        streak = states[habit.id].streak
+        streaks[habit.id] = streak
+        # The ongoing run may have outgrown the stored best without any writes
+        best_streaks[habit.id] = max(habit.best_streak, streak)
+    return streaks, best_streaks
+
+
+def update_cached_streak(habit: Habit, period_start: date, total: float) -> None:
+    """
+    Bring a habit's cached streak up to date after a committed progress change.
+
+    Changes to the present period, or to periods before the streak's break,
+    are applied to the cached state directly. Anything else drops the cache
+    so the next stats request recalculates it.
+    """
+    update_cached_streaks([habit], {habit.id: {period_start: total}})
+
+
+def update_cached_streaks(habits: Sequence[Habit], changes: dict[int, dict[date, float]]) -> None:
+    """
+    Apply committed period totals to several habits' cached streaks.
+
+    Like `update_cached_streak`, with one cache read, one write and one
+    invalidation for all habits together.
+
+    Args:
+        habits: The Habit objects that changed
+        changes: New totals keyed by habit_id, then by period start
+    """
+    states = get_streak_states(habits)
+
+    updated = {}
+    stale = []
+    for habit in habits:
+        state = states.get(habit.id)
+        for period_start, total in changes[habit.id].items():
+            if state is None:
+                break
+            state = apply_period_total(habit, state, period_start, total)
+
+        if state is None:
+            stale.append(habit.id)
+        else:
+            updated[habit.id] = state.to_dict()
+
+    set_cached_streaks(updated)
+    invalidate_streak_caches(stale)
+
+
+def _insert_grouped_totals(*conditions) -> None:
+    """Insert one HabitPeriodTotal row per (habit, period) of the matching entries."""
+    period_start = habit_period_start_expression(ProgressEntry.date)
+    grouped = (
+        select(
+            ProgressEntry.habit_id,
+            period_start,
+            func.sum(ProgressEntry.value),
+            func.count(ProgressEntry.id),
+        )
+        .join(Habit, Habit.id == ProgressEntry.habit_id)
+        .where(*conditions)
+        .group_by(ProgressEntry.habit_id, period_start)
+    )
+    db.session.execute(
+        HabitPeriodTotal.__table__.insert().from_select(
+            ["habit_id", "period_start", "total", "entry_count"], grouped
+        )
+    )
+
+
+def rebuild_period_totals(habit: Habit) -> None:
+    """Recalculate all period totals of a habit from its progress entries."""
+    # The grouping query joins Habit, so pending attribute changes must reach the database first
+    db.session.flush()
+    db.session.execute(
+        HabitPeriodTotal.__table__.delete().where(HabitPeriodTotal.habit_id == habit.id)
+    )
+    _insert_grouped_totals(ProgressEntry.habit_id == habit.id)
+    habit.best_streak = calculate_best_streak(habit, period_totals(habit))
+
+
+def rebuild_all_period_totals() -> None:
+    """
+    Recalculate the whole habit_period_total table in two statements.
+
+    Best streaks are cleared and recalculated on the next stats request.
+    """
+    db.session.execute(HabitPeriodTotal.__table__.delete())
+    _insert_grouped_totals()
+    db.session.execute(Habit.__table__.update().values(best_streak=None))
@@ -1,22 +1,62 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from functools import wraps
 import jwt
 import bcrypt
-from flask import current_app, request, jsonify
+from flask import current_app, has_app_context, request, jsonify
+from app.hashing import get_hash_pool
 from app.security_logger import log_token_validation_failure, log_unauthorized_access
 
 
+# bcrypt's own default cost, used outside an app context
+DEFAULT_BCRYPT_ROUNDS = 12
+
+
+def get_bcrypt_rounds() -> int:
+    """The configured bcrypt cost (BCRYPT_ROUNDS)."""
+    if has_app_context():
+        return int(current_app.config.get("BCRYPT_ROUNDS", DEFAULT_BCRYPT_ROUNDS))
+    return DEFAULT_BCRYPT_ROUNDS
+
+
 def get_hashed_password(plain_text_password: str) -> bytes:
-    return bcrypt.hashpw(plain_text_password.encode("utf-8"), bcrypt.gensalt())
+    """Hash a password on the bcrypt pool; raises HashingUnavailable when it is full."""
+    salt = bcrypt.gensalt(rounds=get_bcrypt_rounds())
+    return get_hash_pool().run(bcrypt.hashpw, plain_text_password.encode("utf-8"), salt)
 
 
 def check_password(plain_text_password: str, hashed_password: bytes) -> bool:
-    return bcrypt.checkpw(plain_text_password.encode("utf-8"), hashed_password)
+    """Check a password on the bcrypt pool; raises HashingUnavailable when it is full."""
+    return get_hash_pool().run(bcrypt.checkpw, plain_text_password.encode("utf-8"), hashed_password)
+
+
+def password_needs_rehash(hashed_password: bytes) -> bool:
+    """
+    Check whether a bcrypt hash was made with a cost other than BCRYPT_ROUNDS.
+
+    Hashes that are not bcrypt ("$2b$12$...") are left alone.
+    """
+    parts = hashed_password.split(b"$")
+    if len(parts) < 4 or parts[0] or not parts[1].startswith(b"2"):
+        return False
+    try:
+        cost = int(parts[2])
+    except ValueError:
+        return False
+    return cost != get_bcrypt_rounds()
+
+
+# Lifetime of access tokens in seconds; sessions are renewed with refresh tokens
+DEFAULT_ACCESS_TOKEN_TTL = 900
 
 
 def create_access_token(user_id: int) -> str:
+    ttl = int(current_app.config.get("ACCESS_TOKEN_TTL", DEFAULT_ACCESS_TOKEN_TTL))
     payload = {
-        "exp": datetime.now(timezone.utc) + timedelta(days=1),
+        "exp": datetime.now(timezone.utc) + timedelta(seconds=ttl),
         "iat": datetime.now(timezone.utc),
         "sub": user_id,
     }
@@ -27,13 +67,93 @@ def create_access_token(user_id: int) -> str:
     return jwt.encode(payload, secret_key, algorithm="HS256")
 
 
+class TokenCache:
+    """
+    Bounded LRU cache of verified token payloads.
+
+    Entries are keyed by a digest of the signing key and the token, so the
+    raw token is never kept and changing SECRET_KEY orphans old entries. An
+    entry is served only until the token's `exp`.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(secret_key: str, token: str) -> str:
+        return hashlib.sha256(f"{secret_key}\0{token}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, payload: dict) -> None:
+        expires_at = payload.get("exp")
+        if not isinstance(expires_at, (int, float)) or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (payload, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def info(self) -> dict:
+        """Hit and miss counts and current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+            }
+
+
+DEFAULT_TOKEN_CACHE_SIZE = 4096
+_token_cache_lock = threading.Lock()
+
+
+def get_token_cache() -> TokenCache:
+    """The current app's token cache, sized by TOKEN_CACHE_SIZE."""
+    cache = current_app.extensions.get("token_cache")
+    if cache is None:
+        with _token_cache_lock:
+            cache = current_app.extensions.get("token_cache")
+            if cache is None:
+                cache = TokenCache(int(current_app.config.get("TOKEN_CACHE_SIZE", DEFAULT_TOKEN_CACHE_SIZE)))
+                current_app.extensions["token_cache"] = cache
+    return cache
+
+
 def decode_token(token: str) -> dict:
     try:
         secret_key = str(current_app.config.get("SECRET_KEY", ""))
         if not secret_key:
             raise ValueError("SECRET_KEY not configured")
 
-        return jwt.decode(token, secret_key, algorithms=["HS256"])
+        token_cache = get_token_cache()
+        cache_key = TokenCache.key(secret_key, token)
+        payload = token_cache.get(cache_key)
+        if payload is None:
+            payload = jwt.decode(token, secret_key, algorithms=["HS256"])
+            token_cache.put(cache_key, payload)
+        return payload
     except jwt.ExpiredSignatureError:
         raise ValueError("Token has expired")
     except jwt.InvalidTokenError:
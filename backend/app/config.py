@@ -33,6 +33,37 @@ class Config:
     SECRET_KEY = get_secret_key()
     DEBUG = os.getenv("ENVIRONMENT") != "production"
 
+    # bcrypt cost for new hashes; older hashes are rehashed on login.
+    # Pick a value for the host with scripts/calibrate_bcrypt.py
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+    # Threads that run bcrypt, and how many more calls may wait for one
+    # before signup and login answer 503
+    BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", "4"))
+    BCRYPT_QUEUE_SIZE = int(os.getenv("BCRYPT_QUEUE_SIZE", "16"))
+
+    # Lifetimes in seconds of access tokens and of the refresh tokens that renew them
+    ACCESS_TOKEN_TTL = int(os.getenv("ACCESS_TOKEN_TTL", "900"))
+    REFRESH_TOKEN_TTL = int(os.getenv("REFRESH_TOKEN_TTL", str(30 * 86400)))
+
+    # Security event log: file to append to (stderr if unset) and entries
+    # buffered for the background writer before new ones are dropped
+    SECURITY_LOG_FILE = os.getenv("SECURITY_LOG_FILE") or None
+    SECURITY_LOG_QUEUE_SIZE = int(os.getenv("SECURITY_LOG_QUEUE_SIZE", "10000"))
+
+    # Seconds over which repeated token failures and unauthorized access
+    # attempts are collapsed into one counted entry; 0 logs each one
+    SECURITY_LOG_AGGREGATE_WINDOW = float(os.getenv("SECURITY_LOG_AGGREGATE_WINDOW", "0"))
+
+    # Verified access tokens kept in memory per process; 0 disables the cache
+    TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+
+    # Streak engine: "ordinal" (period arithmetic) or "walk" (one period at a time)
+    STREAK_ENGINE = os.getenv("STREAK_ENGINE", "ordinal")
+
+    # Most buckets returned by /api/stats/trends before it switches to coarser ones
+    TRENDS_MAX_POINTS = int(os.getenv("TRENDS_MAX_POINTS", "366"))
+
     # Connection pooling configuration for production performance
     # These settings help manage database connections efficiently under load
     SQLALCHEMY_ENGINE_OPTIONS = {
@@ -0,0 +1,99 @@
+"""Per-user data versions and conditional GET support.
+
+Every write to a user's habits or progress increments `User.data_version`
+in the same transaction. Read endpoints derive an ETag from that version,
+so a client polling with If-None-Match gets a 304 while nothing changed.
+The version is mirrored in Redis, which lets unchanged polls be answered
+without touching the database. Writers publish the committed version
+rather than deleting the key: a reader that filled the key from an older
+read could otherwise leave a stale version cached.
+"""
+
+import hashlib
+from datetime import date
+from functools import wraps
+
+from flask import g, make_response, request
+
+from app.models import db, User
+from app.redis_client import (
+    get_cached_data_version,
+    invalidate_cached_dashboard,
+    set_cached_data_version,
+)
+
+
+def bump_data_version(user_id: int) -> None:
+    """
+    Increment a user's data version.
+
+    Runs in the caller's transaction; call `publish_data_version` once it
+    is committed.
+    """
+    db.session.execute(
+        User.__table__.update()
+        .where(User.id == user_id)
+        .values(data_version=User.data_version + 1)
+    )
+
+
+def _load_data_version(user_id: int) -> int:
+    return db.session.execute(
+        db.select(User.data_version).where(User.id == user_id)
+    ).scalar() or 0
+
+
+def publish_data_version(user_id: int) -> None:
+    """Cache a user's committed data version and drop their dashboard snapshot."""
+    set_cached_data_version(user_id, _load_data_version(user_id))
+    invalidate_cached_dashboard(user_id)
+
+
+def get_data_version(user_id: int) -> int:
+    """Current data version of a user, from Redis when cached."""
+    version = get_cached_data_version(user_id)
+    if version is None:
+        version = _load_data_version(user_id)
+        set_cached_data_version(user_id, version)
+    return version
+
+
+def make_etag(user_id: int, version: int, today: date | None = None) -> str:
+    """
+    ETag for the current request at a given data version.
+
+    Includes today's date because completion and streaks move with the
+    period boundaries even without writes, and the full path so different
+    query strings get different tags.
+    """
+    today = today or date.today()
+    key = f"{user_id}:{version}:{today.isoformat()}:{request.full_path}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def conditional_get(f):
+    """
+    Answer a matching If-None-Match with 304 and tag successful responses with an ETag.
+
+    Must be applied below `token_required`. The version the tag is built
+    from is left in `g.data_version` for the view.
+    """
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        # Read the version before the data, so a concurrent write can only
+        # make the tag older than the body, never newer
+        g.data_version = get_data_version(request.user_id)
+        etag = make_etag(request.user_id, g.data_version)
+        if request.if_none_match.contains(etag):
+            response = make_response("", 304)
+        else:
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        # Browsers must revalidate, and shared caches must not store per-user data
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    return decorated
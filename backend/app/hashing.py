@@ -0,0 +1,139 @@
+"""Bounded worker pool for bcrypt.
+
+bcrypt is deliberately slow, so hashing on the request thread lets a burst
+of logins pin every web worker. Work is handed to a small thread pool
+instead (bcrypt releases the GIL while hashing). Requests beyond the pool's
+capacity plus a short queue are rejected straight away with
+`HashingUnavailable`, which the auth routes turn into a 503.
+
+Each app gets its own pool, sized by BCRYPT_WORKERS and BCRYPT_QUEUE_SIZE.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from flask import Flask, current_app, has_app_context
+
+T = TypeVar("T")
+
+DEFAULT_BCRYPT_WORKERS = 4
+DEFAULT_BCRYPT_QUEUE_SIZE = 16
+
+
+class HashingUnavailable(Exception):
+    """Raised when the bcrypt pool and its queue are full."""
+
+
+class _Timing:
+    """Count, total and maximum of a duration, in milliseconds."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms: float) -> None:
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": self.total_ms / self.count if self.count else 0.0,
+            "max_ms": self.max_ms,
+        }
+
+
+class HashPool:
+    """
+    Thread pool that runs bcrypt calls with a cap on waiting work.
+
+    At most `workers` calls run at once and at most `queue_size` more wait
+    for a worker; `run` raises HashingUnavailable instead of queueing more.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._hash_time = _Timing()
+        self._queue_wait = _Timing()
+        self._in_flight = 0
+        self._rejected = 0
+
+    def run(self, func: Callable[..., T], *args) -> T:
+        """Run `func(*args)` on the pool and wait for its result."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HashingUnavailable("Password hashing is at capacity")
+
+        with self._lock:
+            self._in_flight += 1
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._queue_wait.add((started - submitted) * 1000)
+                    self._hash_time.add((finished - started) * 1000)
+
+        try:
+            return self._executor.submit(task).result()
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def metrics(self) -> dict:
+        """Hash latency, queue wait and load of the pool."""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "in_flight": self._in_flight,
+                "rejected": self._rejected,
+                "hash_time": self._hash_time.snapshot(),
+                "queue_wait": self._queue_wait.snapshot(),
+            }
+
+
+def init_hash_pool(app: Flask) -> None:
+    """Create the app's bcrypt pool from BCRYPT_WORKERS and BCRYPT_QUEUE_SIZE."""
+    app.extensions["hash_pool"] = HashPool(
+        workers=int(app.config.get("BCRYPT_WORKERS", DEFAULT_BCRYPT_WORKERS)),
+        queue_size=int(app.config.get("BCRYPT_QUEUE_SIZE", DEFAULT_BCRYPT_QUEUE_SIZE)),
+    )
+
+
+# Used when hashing outside an app context, e.g. from scripts
+_default_pool: Optional[HashPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_hash_pool() -> HashPool:
+    """Get the current app's bcrypt pool, or a default one outside an app."""
+    global _default_pool
+
+    if has_app_context() and "hash_pool" in current_app.extensions:
+        return current_app.extensions["hash_pool"]
+
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool = HashPool(DEFAULT_BCRYPT_WORKERS, DEFAULT_BCRYPT_QUEUE_SIZE)
+    return _default_pool
+
+
+def get_hash_pool_metrics() -> dict:
+    """Metrics of the bcrypt pool (see HashPool.metrics)."""
+    return get_hash_pool().metrics()
@@ -11,6 +11,9 @@ class User(db.Model):
     password = db.Column(db.LargeBinary, nullable=False)
     habits = db.relationship("Habit", backref="user", lazy=True)
 
+    # Incremented on every change to the user's habits or progress; used for ETags
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
 
 class Habit(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -35,8 +38,19 @@ class Habit(db.Model):
         passive_deletes=True,
     )
 
+    period_totals = db.relationship(
+        "HabitPeriodTotal",
+        backref="habit",
+        lazy=True,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
     start_date = db.Column(db.Date, nullable=False, default=date.today)
 
+    # Longest streak seen so far. NULL until first calculated.
+    best_streak = db.Column(db.Integer, nullable=True)
+
 
 class ProgressEntry(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -53,3 +67,31 @@ class ProgressEntry(db.Model):
     __table_args__ = (
         db.Index("ix_progress_entry_habit_date", "habit_id", "date"),
     )
+
+
+class HabitPeriodTotal(db.Model):
+    """Sum of a habit's progress entries within one period of its frequency."""
+
+    habit_id = db.Column(
+        db.Integer,
+        db.ForeignKey("habit.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    period_start = db.Column(db.Date, primary_key=True)
+    total = db.Column(db.Float, nullable=False, default=0)
+    # Rows are removed once their last entry is deleted
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class RefreshToken(db.Model):
+    """A refresh token stored in SQL, used when Redis is unavailable."""
+
+    # sha256 hex digest of the token; the token itself is never stored
+    token_hash = db.Column(db.String(64), primary_key=True)
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("user.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    expires_at = db.Column(db.DateTime, nullable=False)
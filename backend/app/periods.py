@@ -0,0 +1,139 @@
+"""Period arithmetic for habit frequencies.
+
+Every period of a frequency (day, ISO week, month, year) maps to a unique
+integer, and consecutive periods map to consecutive integers. This turns
+"how many periods lie between these dates" into plain subtraction.
+
+`PeriodCalendar` bundles the conversions for one frequency behind bounded
+caches; use `get_calendar` to share one instance per frequency.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Iterable
+from functools import lru_cache
+
+from app.enums import HabitFrequency
+
+
+def period_ordinal(day: date, frequency: HabitFrequency) -> int:
+    """Return the ordinal of the period containing `day`."""
+    match frequency:
+        case HabitFrequency.DAILY:
+            return day.toordinal()
+        case HabitFrequency.WEEKLY:
+            # date(1, 1, 1) has ordinal 1 and is a Monday, so weeks line up with ISO weeks.
+            return (day.toordinal() - 1) // 7
+        case HabitFrequency.MONTHLY:
+            return day.year * 12 + day.month - 1
+        case HabitFrequency.YEARLY:
+            return day.year
+    raise ValueError(f"Unknown habit frequency {frequency}")
+
+
+def ordinal_to_period_start(ordinal: int, frequency: HabitFrequency) -> date:
+    """Return the first day of the period with the given ordinal."""
+    match frequency:
+        case HabitFrequency.DAILY:
+            return date.fromordinal(ordinal)
+        case HabitFrequency.WEEKLY:
+            return date.fromordinal(ordinal * 7 + 1)
+        case HabitFrequency.MONTHLY:
+            return date(ordinal // 12, ordinal % 12 + 1, 1)
+        case HabitFrequency.YEARLY:
+            return date(ordinal, 1, 1)
+    raise ValueError(f"Unknown habit frequency {frequency}")
+
+
+def _compute_period_range(day: date, frequency: HabitFrequency) -> tuple[date, date]:
+    # Start is inclusive, end is exclusive.
+    match frequency:
+        case HabitFrequency.DAILY:
+            start = day
+            end = day + timedelta(days=1)
+        case HabitFrequency.WEEKLY:
+            start = day - timedelta(days=day.weekday())
+            end = start + timedelta(days=7)
+        case HabitFrequency.MONTHLY:
+            start = date(day.year, day.month, 1)
+            if day.month == 12:
+                end = date(day.year + 1, 1, 1)
+            else:
+                end = date(day.year, day.month + 1, 1)
+        case HabitFrequency.YEARLY:
+            start = date(day.year, 1, 1)
+            end = date(day.year + 1, 1, 1)
+        case _:
+            raise ValueError(f"Unknown habit frequency {frequency}")
+    return start, end
+
+
+class PeriodCalendar:
+    """
+    Period arithmetic for one habit frequency.
+
+    Date lookups are memoized in a bounded LRU cache, so the many entries
+    that share a date (or the same few recent periods) are resolved once.
+    The default size holds over twenty years of distinct days.
+    """
+
+    def __init__(self, frequency: HabitFrequency, cache_size: int = 8192):
+        self.frequency = frequency
+        self.period_range = lru_cache(maxsize=cache_size)(self._period_range)
+        self.ordinal = lru_cache(maxsize=cache_size)(self._ordinal)
+
+    def _period_range(self, day: date) -> tuple[date, date]:
+        """Return (start, end) of the period containing `day`; the end is exclusive."""
+        return _compute_period_range(day, self.frequency)
+
+    def _ordinal(self, day: date) -> int:
+        """Return the ordinal of the period containing `day`."""
+        return period_ordinal(day, self.frequency)
+
+    def period_start(self, day: date) -> date:
+        """Return the first day of the period containing `day`."""
+        return self.period_range(day)[0]
+
+    def next_start(self, period_start: date) -> date:
+        """Return the first day of the period after the one starting at `period_start`."""
+        return self.period_range(period_start)[1]
+
+    def previous_start(self, period_start: date) -> date:
+        """Return the first day of the period before the one starting at `period_start`."""
+        return self.period_range(period_start - timedelta(days=1))[0]
+
+    def start_of_ordinal(self, ordinal: int) -> date:
+        """Return the first day of the period with the given ordinal."""
+        return ordinal_to_period_start(ordinal, self.frequency)
+
+    def cache_info(self) -> dict:
+        """Hit and miss counts of the memoized lookups."""
+        return {
+            "period_range": self.period_range.cache_info()._asdict(),
+            "ordinal": self.ordinal.cache_info()._asdict(),
+        }
+
+
+_calendars = {frequency: PeriodCalendar(frequency) for frequency in HabitFrequency}
+
+
+def get_calendar(frequency: HabitFrequency) -> PeriodCalendar:
+    """Return the shared PeriodCalendar for a frequency."""
+    try:
+        return _calendars[frequency]
+    except KeyError:
+        raise ValueError(f"Unknown habit frequency {frequency}")
+
+
+def seconds_until_next_period(frequencies: Iterable[HabitFrequency], now: datetime | None = None) -> int:
+    """
+    Seconds until the earliest current period among `frequencies` ends.
+
+    Periods roll over at local midnight. Returns at least 1.
+    """
+    now = now or datetime.now()
+    today = now.date()
+    ends = [get_calendar(frequency).period_range(today)[1] for frequency in set(frequencies)]
+    if not ends:
+        raise ValueError("No frequencies given")
+    boundary = datetime.combine(min(ends), time())
+    return max(int((boundary - now).total_seconds()), 1)
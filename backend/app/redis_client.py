@@ -1,11 +1,14 @@
-"""Redis client for caching streak calculations."""
+"""Redis client for caching streaks, per-user data versions and dashboard snapshots,
+and for storing refresh tokens."""
 
+import json
 import os
 from typing import Optional
 
 import redis
 
 STREAK_CACHE_TTL = 300  # 5 minutes
+DATA_VERSION_TTL = 86400  # 1 day
 
 _redis_client: Optional[redis.Redis] = None
 
@@ -30,38 +33,200 @@ def get_redis_client() -> Optional[redis.Redis]:
         return None
 
 
-def get_cached_streak(habit_id: int) -> Optional[int]:
-    """Get cached streak for a habit. Returns None if not cached or Redis unavailable."""
+def get_cached_streaks(habit_ids: list[int]) -> dict[int, dict]:
+    """
+    Get cached streak states for several habits in one round trip.
+
+    Returns a dictionary with an entry for each habit that had a readable
+    cached state. Empty if Redis is unavailable.
+    """
+    client = get_redis_client()
+    if client is None or not habit_ids:
+        return {}
+
+    try:
+        values = client.mget([f"streak:{habit_id}" for habit_id in habit_ids])
+    except redis.RedisError:
+        return {}
+
+    states = {}
+    for habit_id, value in zip(habit_ids, values):
+        state = _parse_streak_state(value)
+        if state is not None:
+            states[habit_id] = state
+    return states
+
+
+def _parse_streak_state(value: Optional[str]) -> Optional[dict]:
+    if value is None:
+        return None
+    try:
+        state = json.loads(value)
+    except ValueError:
+        return None
+    return state if isinstance(state, dict) else None
+
+
+def set_cached_streak(habit_id: int, state: dict) -> None:
+    """Cache the streak state (see app.streaks.StreakState) for a habit."""
+    set_cached_streaks({habit_id: state})
+
+
+def set_cached_streaks(states: dict[int, dict]) -> None:
+    """Cache streak states for several habits in one round trip."""
+    client = get_redis_client()
+    if client is None or not states:
+        return
+
+    try:
+        if len(states) == 1:
+            [(habit_id, state)] = states.items()
+            client.setex(f"streak:{habit_id}", STREAK_CACHE_TTL, json.dumps(state))
+            return
+
+        pipeline = client.pipeline(transaction=False)
+        for habit_id, state in states.items():
+            pipeline.setex(f"streak:{habit_id}", STREAK_CACHE_TTL, json.dumps(state))
+        pipeline.execute()
+    except redis.RedisError:
+        pass
+
+
+def invalidate_streak_cache(habit_id: int) -> None:
+    """Invalidate cached streak for a habit."""
+    invalidate_streak_caches([habit_id])
+
+
+def invalidate_streak_caches(habit_ids: list[int]) -> None:
+    """Invalidate cached streaks for several habits in one round trip."""
+    client = get_redis_client()
+    if client is None or not habit_ids:
+        return
+
+    try:
+        client.delete(*[f"streak:{habit_id}" for habit_id in habit_ids])
+    except redis.RedisError:
+        pass
+
+
+def get_cached_data_version(user_id: int) -> Optional[int]:
+    """
+    Get the cached data version of a user.
+
+    Returns None if not cached, unreadable, or Redis unavailable.
+    """
     client = get_redis_client()
     if client is None:
         return None
 
     try:
-        value = client.get(f"streak:{habit_id}")
+        value = client.get(f"data_version:{user_id}")
         return int(value) if value is not None else None
+    except (redis.RedisError, ValueError):
+        return None
+
+
+# Versions only grow, so a late write of an older value must not replace a newer one
+_SET_IF_NEWER = """
+local current = tonumber(redis.call('GET', KEYS[1]))
+if current == nil or current < tonumber(ARGV[1]) then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+end
+"""
+
+
+def set_cached_data_version(user_id: int, version: int) -> None:
+    """Cache the data version of a user unless a newer one is already cached."""
+    client = get_redis_client()
+    if client is None:
+        return
+
+    try:
+        client.eval(_SET_IF_NEWER, 1, f"data_version:{user_id}", version, DATA_VERSION_TTL)
+    except redis.RedisError:
+        pass
+
+
+def get_cached_dashboard(user_id: int, version: int) -> Optional[str]:
+    """
+    Get the cached habit listing of a user as serialized JSON.
+
+    Returns None if not cached, cached for another data version, or Redis
+    unavailable.
+    """
+    client = get_redis_client()
+    if client is None:
+        return None
+
+    try:
+        value = client.get(f"dashboard:{user_id}")
     except redis.RedisError:
         return None
 
+    if value is None:
+        return None
+    cached_version, _, snapshot = value.partition(":")
+    return snapshot if cached_version == str(version) else None
+
 
-def set_cached_streak(habit_id: int, streak: int) -> None:
-    """Cache a streak value for a habit."""
+def set_cached_dashboard(user_id: int, version: int, snapshot: str, ttl: int) -> None:
+    """
+    Cache the serialized habit listing of a user for `ttl` seconds.
+
+    The snapshot is tagged with the data version read before building it,
+    so one stored after a concurrent write is never served for the newer version.
+    """
     client = get_redis_client()
     if client is None:
         return
 
     try:
-        client.setex(f"streak:{habit_id}", STREAK_CACHE_TTL, streak)
+        client.setex(f"dashboard:{user_id}", ttl, f"{version}:{snapshot}")
     except redis.RedisError:
         pass
 
 
-def invalidate_streak_cache(habit_id: int) -> None:
-    """Invalidate cached streak for a habit."""
+def invalidate_cached_dashboard(user_id: int) -> None:
+    """Invalidate the cached dashboard snapshot of a user."""
     client = get_redis_client()
     if client is None:
         return
 
     try:
-        client.delete(f"streak:{habit_id}")
+        client.delete(f"dashboard:{user_id}")
     except redis.RedisError:
         pass
+
+
+def store_refresh_token(token_hash: str, user_id: int, ttl: int) -> bool:
+    """
+    Store a refresh token digest for `ttl` seconds.
+
+    Returns False if Redis is unavailable, so the caller can fall back to SQL.
+    """
+    client = get_redis_client()
+    if client is None:
+        return False
+
+    try:
+        client.setex(f"refresh_token:{token_hash}", ttl, user_id)
+        return True
+    except redis.RedisError:
+        return False
+
+
+def pop_refresh_token(token_hash: str) -> Optional[int]:
+    """
+    Remove a refresh token digest and return its user id.
+
+    Returns None if the token is not stored in Redis or Redis is unavailable.
+    """
+    client = get_redis_client()
+    if client is None:
+        return None
+
+    try:
+        value = client.getdel(f"refresh_token:{token_hash}")
+        return int(value) if value is not None else None
+    except (redis.RedisError, ValueError):
+        return None
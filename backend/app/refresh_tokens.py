@@ -0,0 +1,91 @@
+"""Rotating refresh tokens.
+
+A refresh token is an opaque random string that can be exchanged once for a
+new access token and a new refresh token. Only its sha256 digest is stored:
+in Redis when available, otherwise in the `refresh_token` table. Exchanging
+a token is a keyed lookup, so renewing a session never runs bcrypt.
+"""
+
+import hashlib
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from flask import current_app
+
+from app.models import db, RefreshToken
+from app.redis_client import pop_refresh_token, store_refresh_token
+
+DEFAULT_REFRESH_TOKEN_TTL = 30 * 86400  # 30 days
+
+
+def _hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _utcnow() -> datetime:
+    # The expires_at column holds naive UTC datetimes
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _refresh_token_ttl() -> int:
+    return int(current_app.config.get("REFRESH_TOKEN_TTL", DEFAULT_REFRESH_TOKEN_TTL))
+
+
+def issue_refresh_token(user_id: int) -> str:
+    """
+    Create and store a refresh token for a user.
+
+    Commits the session when the token is stored in SQL.
+    """
+    token = secrets.token_urlsafe(32)
+    token_hash = _hash_token(token)
+    ttl = _refresh_token_ttl()
+
+    if store_refresh_token(token_hash, user_id, ttl):
+        return token
+
+    now = _utcnow()
+    # Drop the user's expired tokens while we are writing anyway
+    RefreshToken.query.filter(
+        RefreshToken.user_id == user_id, RefreshToken.expires_at <= now
+    ).delete(synchronize_session=False)
+    db.session.add(
+        RefreshToken(token_hash=token_hash, user_id=user_id, expires_at=now + timedelta(seconds=ttl))
+    )
+    db.session.commit()
+    return token
+
+
+def consume_refresh_token(token: str) -> Optional[int]:
+    """
+    Invalidate a refresh token and return the user it was issued to.
+
+    Returns None if the token is unknown, expired or already used.
+    """
+    token_hash = _hash_token(token)
+
+    user_id = pop_refresh_token(token_hash)
+    if user_id is not None:
+        return user_id
+
+    stored = db.session.get(RefreshToken, token_hash)
+    if stored is None:
+        return None
+
+    user_id, expires_at = stored.user_id, stored.expires_at
+    # Only the request that deletes the row may use it
+    deleted = RefreshToken.query.filter_by(token_hash=token_hash).delete(synchronize_session=False)
+    db.session.commit()
+    if deleted != 1 or expires_at <= _utcnow():
+        return None
+    return user_id
+
+
+def revoke_refresh_token(token: str) -> None:
+    """Invalidate a refresh token, wherever it is stored."""
+    token_hash = _hash_token(token)
+    if pop_refresh_token(token_hash) is not None:
+        return
+    RefreshToken.query.filter_by(token_hash=token_hash).delete(synchronize_session=False)
+    db.session.commit()
@@ -4,19 +4,33 @@ from app.auth import (
     get_hashed_password,
     check_password,
     create_access_token,
+    password_needs_rehash,
     token_required,
 )
+from app.hashing import HashingUnavailable
 from app.limiter import limiter
+from app.refresh_tokens import consume_refresh_token, issue_refresh_token, revoke_refresh_token
 from app.validators import validate_auth_credentials
 from app.security_logger import (
     log_login_success,
     log_login_failure,
     log_signup_success,
     log_signup_failure,
+    log_token_validation_failure,
 )
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/auth")
 
+# Seconds clients are asked to wait when password hashing is at capacity
+HASHING_RETRY_AFTER = 1
+
+
+@auth_bp.errorhandler(HashingUnavailable)
+def hashing_unavailable(error):
+    response = jsonify({"success": False, "message": "Server is busy, please try again shortly"})
+    response.headers["Retry-After"] = str(HASHING_RETRY_AFTER)
+    return response, 503
+
 
 @auth_bp.route("/signup", methods=["POST"])
 @limiter.limit("3 per hour")
@@ -42,13 +56,19 @@ def signup():
     db.session.commit()
 
     token = create_access_token(new_user.id)
+    refresh_token = issue_refresh_token(new_user.id)
 
     log_signup_success(username, new_user.id)
 
     return (
         jsonify({
             "success": True,
-            "data": {"token": token, "user_id": new_user.id, "username": new_user.username},
+            "data": {
+                "token": token,
+                "refresh_token": refresh_token,
+                "user_id": new_user.id,
+                "username": new_user.username,
+            },
         }),
         201,
     )
@@ -72,16 +92,62 @@ def login():
         log_login_failure(username, "invalid_credentials")
         return jsonify({"success": False, "message": "Invalid username or password"}), 401
 
+    # Bring the hash to the configured cost while the plain password is at hand
+    if password_needs_rehash(user.password):
+        try:
+            user.password = get_hashed_password(password)
+            db.session.commit()
+        except HashingUnavailable:
+            pass  # Retried on the next login
+
     token = create_access_token(user.id)
+    refresh_token = issue_refresh_token(user.id)
 
     log_login_success(username, user.id)
 
     return jsonify({
         "success": True,
-        "data": {"token": token, "user_id": user.id, "username": user.username},
+        "data": {
+            "token": token,
+            "refresh_token": refresh_token,
+            "user_id": user.id,
+            "username": user.username,
+        },
     }), 200
 
 
+@auth_bp.route("/refresh", methods=["POST"])
+@limiter.limit("30 per minute")
+def refresh():
+    """Exchange a refresh token for a new access token and refresh token."""
+    data = request.get_json(silent=True) or {}
+    refresh_token = data.get("refresh_token")
+
+    user_id = consume_refresh_token(refresh_token) if isinstance(refresh_token, str) else None
+    if user_id is None:
+        log_token_validation_failure("invalid_refresh_token")
+        return jsonify({"success": False, "message": "Invalid or expired refresh token"}), 401
+
+    return jsonify({
+        "success": True,
+        "data": {
+            "token": create_access_token(user_id),
+            "refresh_token": issue_refresh_token(user_id),
+            "user_id": user_id,
+        },
+    }), 200
+
+
+@auth_bp.route("/logout", methods=["POST"])
+def logout():
+    """Revoke a refresh token so it cannot renew the session."""
+    data = request.get_json(silent=True) or {}
+    refresh_token = data.get("refresh_token")
+    if isinstance(refresh_token, str):
+        revoke_refresh_token(refresh_token)
+    return jsonify({"success": True}), 200
+
+
 @auth_bp.route("/verify", methods=["GET"])
 @token_required
 def verify_token():
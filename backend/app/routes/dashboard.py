@@ -0,0 +1,61 @@
+from flask import Blueprint, jsonify, request
+
+from app.aggregates import current_period_condition, load_streaks
+from app.auth import token_required
+from app.data_version import conditional_get
+from app.models import db, Habit, ProgressEntry
+from app.routes.habits import HABIT_FIELDS
+
+dashboard_bp = Blueprint("dashboard", __name__, url_prefix="/dashboard")
+
+
+@dashboard_bp.route("", methods=["GET"])
+@token_required
+@conditional_get
+def get_dashboard():
+    """Habits with completion, current-period progress and streaks in one response."""
+    habits = Habit.query.filter_by(user_id=request.user_id).order_by(Habit.id).all()
+    if not habits:
+        return jsonify({
+            "success": True,
+            "data": {"habits": [], "progress": [], "streaks": {}, "best_streaks": {}},
+        })
+
+    # Every habit's current-period entries in one query
+    entries = (
+        ProgressEntry.query.join(Habit)
+        .filter(Habit.user_id == request.user_id, current_period_condition(ProgressEntry.date))
+        .order_by(ProgressEntry.habit_id, ProgressEntry.date, ProgressEntry.id)
+        .all()
+    )
+    current_totals = {habit.id: 0 for habit in habits}
+    for entry in entries:
+        current_totals[entry.habit_id] += entry.value
+
+    streaks, best_streaks = load_streaks(habits)
+
+    response = jsonify({
+        "success": True,
+        "data": {
+            "habits": [
+                {field: value(habit, current_totals[habit.id]) for field, (_, value) in HABIT_FIELDS.items()}
+                for habit in habits
+            ],
+            "progress": [
+                {
+                    "id": entry.id,
+                    "habit_id": entry.habit_id,
+                    "date": entry.date.isoformat(),
+                    "value": entry.value,
+                }
+                for entry in entries
+            ],
+            "streaks": streaks,
+            "best_streaks": best_streaks,
+        },
+    })
+    # Store best streaks calculated for the first time. Done after serializing,
+    # since committing expires the habits and would reload each of them.
+    if db.session.dirty:
+        db.session.commit()
+    return response
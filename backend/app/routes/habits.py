@@ -1,12 +1,38 @@
-from flask import Blueprint, request, jsonify
-from app.models import db, Habit, ProgressEntry
+from flask import Blueprint, current_app, g, request, jsonify
+from sqlalchemy.orm import load_only
+from app.models import db, Habit
 from app.enums import HabitFrequency, HabitType
+from app.aggregates import load_current_period_totals, rebuild_period_totals
 from app.auth import token_required
-from app.utils import filter_progress_to_current_period, calculate_habit_completion
+from app.data_version import bump_data_version, conditional_get, publish_data_version
+from app.periods import seconds_until_next_period
+from app.redis_client import (
+    get_cached_dashboard,
+    invalidate_streak_cache,
+    set_cached_dashboard,
+)
+from app.streaks import is_period_successful
 from app.validators import validate_habit_data
 
 habits_bp = Blueprint("habits", __name__, url_prefix="/habits")
 
+MAX_HABITS_PAGE_SIZE = 200
+
+# Listing fields: (columns to load, value from the habit and its current-period total)
+HABIT_FIELDS = {
+    "id": ((), lambda habit, total: habit.id),
+    "name": ((Habit.name,), lambda habit, total: habit.name),
+    "type": ((Habit.type,), lambda habit, total: habit.type.name.lower()),
+    "frequency": ((Habit.frequency,), lambda habit, total: habit.frequency.name.lower()),
+    "target": ((Habit.target_value,), lambda habit, total: habit.target_value),
+    "unit": ((Habit.unit,), lambda habit, total: habit.unit),
+    "current_total": ((Habit.frequency,), lambda habit, total: total),
+    "is_completed": (
+        (Habit.frequency, Habit.type, Habit.target_value),
+        lambda habit, total: is_period_successful(habit, total),
+    ),
+}
+
 
 @habits_bp.route("", methods=["POST"])
 @token_required
@@ -51,7 +77,9 @@ def create_habit():
     )
 
     db.session.add(new_habit)
+    bump_data_version(request.user_id)
     db.session.commit()
+    publish_data_version(request.user_id)
 
     return (
         jsonify({
@@ -85,6 +113,15 @@ def update_habit(habit_id: int):
 
     # Whitelist of allowed fields to prevent attribute injection
     allowed_fields = {"name", "type", "frequency", "target_value", "unit"}
+    previous_frequency = habit.frequency
+
+    try:
+        if "type" in data:
+            data["type"] = HabitType[data["type"].upper()]
+        if "frequency" in data:
+            data["frequency"] = HabitFrequency[data["frequency"].upper()]
+    except (KeyError, AttributeError):
+        return jsonify({"success": False, "message": "Invalid type or frequency value"}), 400
 
     for key, value in data.items():
         # Map "target" to "target_value" for backwards compatibility
@@ -95,49 +132,93 @@ def update_habit(habit_id: int):
         if key in allowed_fields:
             setattr(habit, key, value)
 
+    if habit.frequency != previous_frequency:
+        # Period totals are keyed by period start, which depends on the frequency
+        rebuild_period_totals(habit)
+    elif data.keys() & {"type", "target", "target_value"}:
+        # Streaks depend on how periods are judged; recalculate them on next read.
+        habit.best_streak = None
+
+    bump_data_version(request.user_id)
     db.session.commit()
+    publish_data_version(request.user_id)
+    invalidate_streak_cache(habit_id)
 
     return jsonify({"success": True, "message": "Habit updated successfully."}), 200
 
 
 @habits_bp.route("", methods=["GET"])
 @token_required
+@conditional_get
 def fetch_habits():
-    habits = Habit.query.filter_by(user_id=request.user_id).all()
+    # The default listing is served from a per-user snapshot of the current data version
+    is_default_listing = not request.args
+    if is_default_listing:
+        snapshot = get_cached_dashboard(request.user_id, g.data_version)
+        if snapshot is not None:
+            return current_app.response_class(snapshot, mimetype="application/json"), 200
+
+    # Sparse fieldset: ?fields=name,is_completed (the id is always included)
+    fields = list(HABIT_FIELDS)
+    if request.args.get("fields"):
+        names = [f.strip() for f in request.args["fields"].split(",")]
+        fields = ["id", *(name for name in names if name and name != "id")]
+        unknown = [f for f in fields if f not in HABIT_FIELDS]
+        if unknown:
+            return jsonify({"success": False, "message": f"Unknown fields: {', '.join(unknown)}"}), 400
+
+    # Keyset pagination on habit id: ?limit=50&after=<next_cursor>
+    limit = after = None
+    try:
+        if "limit" in request.args:
+            limit = int(request.args["limit"])
+            if not 1 <= limit <= MAX_HABITS_PAGE_SIZE:
+                raise ValueError
+        if "after" in request.args:
+            after = int(request.args["after"])
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "message": f"limit must be between 1 and {MAX_HABITS_PAGE_SIZE} and after must be a habit id",
+        }), 400
+
+    columns = {column for field in fields for column in HABIT_FIELDS[field][0]}
+    query = Habit.query.filter_by(user_id=request.user_id).options(load_only(Habit.id, *columns))
+    if after is not None:
+        query = query.filter(Habit.id > after)
+    query = query.order_by(Habit.id)
+    if limit is not None:
+        # One extra row tells whether another page follows
+        query = query.limit(limit + 1)
+    habits = query.all()
+
+    next_cursor = None
+    if limit is not None and len(habits) > limit:
+        habits = habits[:limit]
+        next_cursor = habits[-1].id
 
     # Return early if no habits
     if not habits:
-        return jsonify({"success": True, "data": []}), 200
-
-    # Fetch ALL progress entries for ALL habits in a single query
-    habit_ids = [habit.id for habit in habits]
-    all_progress_entries = (
-        ProgressEntry.query.filter(ProgressEntry.habit_id.in_(habit_ids)).all()
-    )
-
-    # Filter progress entries to current period for each habit
-    habit_progress = filter_progress_to_current_period(habits, all_progress_entries)
-
-    return (
-        jsonify({
-            "success": True,
-            "data": [
-                {
-                    "id": habit.id,
-                    "name": habit.name,
-                    "type": habit.type.name.lower(),
-                    "frequency": habit.frequency.name.lower(),
-                    "target": habit.target_value,
-                    "unit": habit.unit,
-                    "is_completed": calculate_habit_completion(
-                        habit, habit_progress[habit.id]
-                    ),
-                }
-                for habit in habits
-            ],
-        }),
-        200,
-    )
+        return jsonify({"success": True, "data": [], "next_cursor": None}), 200
+
+    # Pre-summed progress of each habit's current period, in a single query
+    current_totals = {}
+    if {"current_total", "is_completed"} & set(fields):
+        current_totals = load_current_period_totals(habits)
+
+    response = jsonify({
+        "success": True,
+        "data": [
+            {field: HABIT_FIELDS[field][1](habit, current_totals.get(habit.id)) for field in fields}
+            for habit in habits
+        ],
+        "next_cursor": next_cursor,
+    })
+    if is_default_listing:
+        # Completion flags go stale when the first of the habits' periods ends
+        ttl = seconds_until_next_period(habit.frequency for habit in habits)
+        set_cached_dashboard(request.user_id, g.data_version, response.get_data(as_text=True), ttl)
+    return response, 200
 
 
 @habits_bp.route("/<int:habit_id>", methods=["DELETE"])
@@ -149,6 +230,8 @@ def delete_habit(habit_id: int):
         return jsonify({"success": False, "message": "Habit not found"}), 404
 
     db.session.delete(habit)
+    bump_data_version(request.user_id)
     db.session.commit()
+    publish_data_version(request.user_id)
 
     return jsonify({"success": True, "message": "Habit deleted successfully."}), 200
@@ -0,0 +1,19 @@
+from flask import Blueprint, jsonify
+
+from app.auth import token_required
+from app.hashing import get_hash_pool_metrics
+
+health_bp = Blueprint("health", __name__, url_prefix="/health")
+
+
+@health_bp.route("", methods=["GET"])
+def get_health():
+    """Liveness check."""
+    return jsonify({"success": True}), 200
+
+
+@health_bp.route("/hashing", methods=["GET"])
+@token_required
+def get_hashing_metrics():
+    """Load, rejected calls, hash latency and queue wait of the password hashing pool."""
+    return jsonify({"success": True, "data": get_hash_pool_metrics()}), 200
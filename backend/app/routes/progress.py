@@ -1,15 +1,73 @@
-from datetime import datetime, timezone
-from flask import Blueprint, request, jsonify
+import base64
+import binascii
+from datetime import date, datetime, timezone
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from sqlalchemy import and_, select, tuple_
 from sqlalchemy.exc import IntegrityError
 
 from app.models import db, Habit, ProgressEntry
+from app.aggregates import (
+    current_period_condition,
+    record_progress_added,
+    record_progress_batch_added,
+    record_progress_batch_removed,
+    record_progress_removed,
+    update_cached_streak,
+    update_cached_streaks,
+)
 from app.auth import token_required
-from app.redis_client import invalidate_streak_cache
-from app.utils import filter_progress_to_current_period
+from app.data_version import bump_data_version, conditional_get, publish_data_version
 from app.validators import validate_progress_data, validate_date_string
 
 progress_bp = Blueprint("progress", __name__, url_prefix="/progress")
 
+# Rows fetched per round trip when streaming a full export
+EXPORT_CHUNK_SIZE = 1000
+MAX_PROGRESS_PAGE_SIZE = 500
+MAX_BATCH_SIZE = 5000
+
+
+def _is_id(value) -> bool:
+    # bool is a subclass of int, but true/false are not ids
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _encode_cursor(entry: ProgressEntry) -> str:
+    return base64.urlsafe_b64encode(f"{entry.date.isoformat()}:{entry.id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[date, int]:
+    """Return the (date, id) position of a cursor; raises ValueError if malformed."""
+    try:
+        day, entry_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return date.fromisoformat(day), int(entry_id)
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _serialize_entry(entry: ProgressEntry) -> dict:
+    return {
+        "id": entry.id,
+        "habit_id": entry.habit_id,
+        "date": entry.date.isoformat(),
+        "value": entry.value,
+    }
+
+
+def _stream_entries(query):
+    """Yield the response envelope and entries as JSON text, one chunk of rows at a time."""
+    dumps = current_app.json.dumps
+    yield '{"success": true, "data": ['
+    separator = ""
+    chunk = []
+    for entry in query.yield_per(EXPORT_CHUNK_SIZE):
+        chunk.append(separator + dumps(_serialize_entry(entry)))
+        separator = ","
+        if len(chunk) == EXPORT_CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk = []
+    yield "".join(chunk) + "]}"
+
 
 @progress_bp.route("", methods=["POST"])
 @token_required
@@ -41,10 +99,13 @@ def add_progress():
         return jsonify({"success": False, "message": error_message}), 400
 
     try:
+        period_start, period_total = record_progress_added(habit, entry_date, value)
         entry = ProgressEntry(habit_id=habit_id, date=entry_date, value=value)
         db.session.add(entry)
+        bump_data_version(request.user_id)
         db.session.commit()
-        invalidate_streak_cache(habit_id)
+        publish_data_version(request.user_id)
+        update_cached_streak(habit, period_start, period_total)
     except IntegrityError:
         db.session.rollback()
         return jsonify({"success": False, "message": "Duplicate entry for this habit and date"}), 400
@@ -63,70 +124,198 @@ def add_progress():
     )
 
 
+@progress_bp.route("/batch", methods=["POST"])
+@token_required
+def add_progress_batch():
+    data = request.get_json()
+    items = data.get("entries") if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return jsonify({"success": False, "message": "entries must be a non-empty list"}), 400
+    if len(items) > MAX_BATCH_SIZE:
+        return jsonify({"success": False, "message": f"At most {MAX_BATCH_SIZE} entries per batch"}), 400
+
+    # Ownership of every referenced habit in one query. Locked until commit so a
+    # concurrent habit delete cannot remove them between this check and the insert
+    habit_ids = {
+        item["habit_id"] for item in items if isinstance(item, dict) and _is_id(item.get("habit_id"))
+    }
+    habits = {
+        habit.id: habit
+        for habit in Habit.query.filter(Habit.id.in_(habit_ids), Habit.user_id == request.user_id)
+        .with_for_update()
+    }
+
+    today = datetime.now(timezone.utc).date()
+    results = []
+    rows = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get("habit_id") or item.get("value") is None:
+            results.append({"index": index, "success": False, "message": "Missing required fields"})
+            continue
+        if not _is_id(item["habit_id"]) or item["habit_id"] not in habits:
+            results.append({"index": index, "success": False, "message": "Habit not found or unauthorized"})
+            continue
+
+        is_valid, error_message, entry_date = validate_date_string(item.get("date"))
+        if is_valid:
+            is_valid, error_message = validate_progress_data(item)
+        if not is_valid:
+            results.append({"index": index, "success": False, "message": error_message})
+            continue
+
+        row = {"habit_id": item["habit_id"], "date": entry_date or today, "value": item["value"]}
+        rows.append(row)
+        results.append({
+            "index": index,
+            "success": True,
+            "data": {**row, "date": row["date"].isoformat()},
+        })
+
+    if not rows:
+        return jsonify({"success": False, "message": "No valid entries", "results": results}), 400
+
+    rows_by_habit: dict[int, list[dict]] = {}
+    for row in rows:
+        rows_by_habit.setdefault(row["habit_id"], []).append(row)
+
+    try:
+        # Aggregates are updated once per habit, then every entry goes in one executemany
+        changes = {
+            habit_id: record_progress_batch_added(
+                habits[habit_id], [(row["date"], row["value"]) for row in habit_rows]
+            )
+            for habit_id, habit_rows in rows_by_habit.items()
+        }
+        db.session.execute(ProgressEntry.__table__.insert(), rows)
+        bump_data_version(request.user_id)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        # Nothing was stored: report the entries that passed validation as failed too
+        for result in results:
+            if result["success"]:
+                result.update(success=False, message="Could not store the entry")
+                del result["data"]
+        return jsonify({"success": False, "message": "Could not store the entries", "results": results}), 409
+
+    publish_data_version(request.user_id)
+    update_cached_streaks([habits[habit_id] for habit_id in changes], changes)
+
+    return (
+        jsonify({
+            "success": True,
+            "data": {"created": len(rows), "failed": len(items) - len(rows), "results": results},
+        }),
+        201,
+    )
+
+
 @progress_bp.route("", methods=["GET"])
 @token_required
+@conditional_get
 def get_progress_entries():
     habit_id = request.args.get("habit_id", type=int)
     start_date = request.args.get("start_date")
     end_date = request.args.get("end_date")
     include_all = request.args.get("all", "false").lower() == "true"
 
-    # First verify that the habit belongs to the user
-    if habit_id:
-        habit = Habit.query.filter_by(id=habit_id, user_id=request.user_id).first()
-        if not habit:
-            return jsonify({"success": False, "message": "Habit not found or unauthorized"}), 404
-
-    query = ProgressEntry.query
-    if habit_id:
-        query = query.join(Habit).filter(
-            Habit.user_id == request.user_id, ProgressEntry.habit_id == habit_id
-        )
-    else:
-        query = query.join(Habit).filter(Habit.user_id == request.user_id)
+    # Keyset pagination through the history: ?limit=50&cursor=<next_cursor>
+    limit = cursor = None
+    try:
+        if "limit" in request.args:
+            limit = int(request.args["limit"])
+            if not 1 <= limit <= MAX_PROGRESS_PAGE_SIZE:
+                raise ValueError
+        if "cursor" in request.args:
+            cursor = _decode_cursor(request.args["cursor"])
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "message": f"limit must be between 1 and {MAX_PROGRESS_PAGE_SIZE} and cursor must come from next_cursor",
+        }), 400
+    if cursor is not None and limit is None:
+        # Without a page size the request would silently fall back to the current-period listing
+        return jsonify({"success": False, "message": "cursor requires limit"}), 400
 
-    # Apply explicit date filters if given
+    # Explicit date filters, if given
+    conditions = []
     if start_date:
         try:
-            start_date_obj = datetime.strptime(start_date, "%Y-%m-%d").date()
-            query = query.filter(ProgressEntry.date >= start_date_obj)
+            conditions.append(ProgressEntry.date >= datetime.strptime(start_date, "%Y-%m-%d").date())
         except ValueError:
             return jsonify({"success": False, "message": "Invalid start_date format. Use YYYY-MM-DD."}), 400
 
     if end_date:
         try:
-            end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date()
-            query = query.filter(ProgressEntry.date <= end_date_obj)
+            conditions.append(ProgressEntry.date <= datetime.strptime(end_date, "%Y-%m-%d").date())
         except ValueError:
             return jsonify({"success": False, "message": "Invalid end_date format. Use YYYY-MM-DD."}), 400
 
-    entries = query.all()
-    if not include_all:
-        habits = Habit.query.filter_by(user_id=request.user_id).all()
-        filtered_by_habit = filter_progress_to_current_period(habits, entries)
-        # Flatten the filtered results back into a list
-        entries = [
-            entry for entries_list in filtered_by_habit.values() for entry in entries_list
-        ]
+    if include_all or limit is not None:
+        # Verify that the habit belongs to the user up front; a stream cannot turn into a 404
+        if habit_id and not Habit.query.filter_by(id=habit_id, user_id=request.user_id).first():
+            return jsonify({"success": False, "message": "Habit not found or unauthorized"}), 404
+
+        query = ProgressEntry.query.join(Habit).filter(Habit.user_id == request.user_id, *conditions)
+        if habit_id:
+            query = query.filter(ProgressEntry.habit_id == habit_id)
+
+        if limit is not None:
+            # Newest first; seek past the cursor instead of using OFFSET, so every
+            # page is an index range scan of the same cost
+            if cursor is not None:
+                query = query.filter(tuple_(ProgressEntry.date, ProgressEntry.id) < tuple_(*cursor))
+            entries = (
+                query.order_by(ProgressEntry.date.desc(), ProgressEntry.id.desc())
+                .limit(limit + 1)
+                .all()
+            )
+            next_cursor = _encode_cursor(entries[limit - 1]) if len(entries) > limit else None
+            return jsonify({
+                "success": True,
+                "data": [_serialize_entry(entry) for entry in entries[:limit]],
+                "next_cursor": next_cursor,
+            })
+
+        # Full history: stream it in chunks so memory stays flat however long it is
+        query = query.order_by(ProgressEntry.date, ProgressEntry.id)
+        return Response(stream_with_context(_stream_entries(query)), mimetype="application/json")
+
+    # Only each habit's current period, filtered in the database
+    conditions.append(current_period_condition(ProgressEntry.date))
+    if habit_id:
+        # Outer join from the habit, so an unknown or foreign habit yields no row at all
+        # and ownership is checked by the same query
+        rows = db.session.execute(
+            select(Habit.id, ProgressEntry)
+            .outerjoin(ProgressEntry, and_(ProgressEntry.habit_id == Habit.id, *conditions))
+            .where(Habit.id == habit_id, Habit.user_id == request.user_id)
+            .order_by(ProgressEntry.date, ProgressEntry.id)
+        ).all()
+        if not rows:
+            return jsonify({"success": False, "message": "Habit not found or unauthorized"}), 404
+        entries = [row.ProgressEntry for row in rows if row.ProgressEntry is not None]
+    else:
+        entries = (
+            ProgressEntry.query.join(Habit)
+            .filter(Habit.user_id == request.user_id, *conditions)
+            .order_by(ProgressEntry.habit_id, ProgressEntry.date, ProgressEntry.id)
+            .all()
+        )
 
     return jsonify({
         "success": True,
-        "data": [
-            {
-                "id": entry.id,
-                "habit_id": entry.habit_id,
-                "date": entry.date.isoformat(),
-                "value": entry.value,
-            }
-            for entry in entries
-        ],
+        "data": [_serialize_entry(entry) for entry in entries],
     })
 
 
 @progress_bp.route("/<int:entry_id>", methods=["DELETE"])
 @token_required
 def delete_progress_entry(entry_id):
-    entry = db.session.get(ProgressEntry, entry_id)
+    # Locked so a concurrent delete of the same entry waits instead of decrementing the totals twice
+    entry = db.session.execute(
+        select(ProgressEntry).where(ProgressEntry.id == entry_id).with_for_update()
+    ).scalar_one_or_none()
     if not entry:
         return jsonify({"success": False, "message": "Progress entry not found"}), 404
 
@@ -135,8 +324,100 @@ def delete_progress_entry(entry_id):
     if not habit:
         return jsonify({"success": False, "message": "Progress entry not found"}), 404
 
-    habit_id = entry.habit_id
-    db.session.delete(entry)
+    period_start, period_total = record_progress_removed(habit, entry.date, entry.value)
+    deleted = db.session.execute(ProgressEntry.__table__.delete().where(ProgressEntry.id == entry_id))
+    if deleted.rowcount != 1:
+        db.session.rollback()
+        return jsonify({"success": False, "message": "Progress entry not found"}), 404
+    # The row is gone; keep the session from reloading the object
+    db.session.expunge(entry)
+    bump_data_version(request.user_id)
     db.session.commit()
-    invalidate_streak_cache(habit_id)
+    publish_data_version(request.user_id)
+    update_cached_streak(habit, period_start, period_total)
     return jsonify({"success": True, "message": f"Progress entry {entry_id} deleted"}), 200
+
+
+@progress_bp.route("", methods=["DELETE"])
+@token_required
+def delete_progress_entries():
+    """
+    Delete entries by {"ids": [...]} or by {"habit_id", "start_date", "end_date"}.
+
+    A range needs at least one date bound; {"habit_id", "all": true} deletes the
+    habit's whole history.
+    """
+    data = request.get_json(silent=True) or {}
+    ids = data.get("ids")
+    habit_id = data.get("habit_id")
+
+    if ids is not None:
+        if not isinstance(ids, list) or not ids or not all(_is_id(i) for i in ids):
+            return jsonify({"success": False, "message": "ids must be a non-empty list of entry ids"}), 400
+        if len(ids) > MAX_BATCH_SIZE:
+            return jsonify({"success": False, "message": f"At most {MAX_BATCH_SIZE} entries per batch"}), 400
+        conditions = [ProgressEntry.id.in_(ids)]
+    elif _is_id(habit_id):
+        dates = {}
+        for name in ("start_date", "end_date"):
+            if data.get(name):
+                try:
+                    dates[name] = datetime.strptime(data[name], "%Y-%m-%d").date()
+                except (TypeError, ValueError):
+                    return jsonify({"success": False, "message": f"Invalid {name} format. Use YYYY-MM-DD."}), 400
+
+        if not dates and data.get("all") is not True:
+            return jsonify({
+                "success": False,
+                "message": "Provide start_date or end_date, or all: true to delete every entry",
+            }), 400
+
+        conditions = [ProgressEntry.habit_id == habit_id]
+        if "start_date" in dates:
+            conditions.append(ProgressEntry.date >= dates["start_date"])
+        if "end_date" in dates:
+            conditions.append(ProgressEntry.date <= dates["end_date"])
+    else:
+        return jsonify({"success": False, "message": "Provide ids or habit_id"}), 400
+
+    # The affected rows, restricted to the user's habits; their values adjust the aggregates
+    rows = db.session.execute(
+        select(ProgressEntry.id, ProgressEntry.date, ProgressEntry.value, Habit)
+        .join(Habit, Habit.id == ProgressEntry.habit_id)
+        .where(Habit.user_id == request.user_id, *conditions)
+        # Locked until commit so concurrent deletes of the same rows cannot both adjust the aggregates
+        .with_for_update()
+    ).all()
+
+    entries_by_habit: dict[int, list] = {}
+    habits = {}
+    for row in rows:
+        habits[row.Habit.id] = row.Habit
+        entries_by_habit.setdefault(row.Habit.id, []).append((row.date, row.value))
+
+    deleted_ids = [row.id for row in rows]
+    if deleted_ids:
+        changes = {
+            habit_id: record_progress_batch_removed(habits[habit_id], entries)
+            for habit_id, entries in entries_by_habit.items()
+        }
+        deleted = db.session.execute(
+            ProgressEntry.__table__.delete().where(ProgressEntry.id.in_(deleted_ids))
+        )
+        if deleted.rowcount != len(deleted_ids):
+            db.session.rollback()
+            return jsonify({
+                "success": False,
+                "message": "Entries were changed by another request, please retry",
+            }), 409
+        bump_data_version(request.user_id)
+        db.session.commit()
+        publish_data_version(request.user_id)
+        update_cached_streaks(list(habits.values()), changes)
+
+    result = {"deleted": len(deleted_ids)}
+    if ids is not None:
+        # Ids that do not exist and ids of other users' entries are reported alike
+        deleted = set(deleted_ids)
+        result["not_found"] = [i for i in ids if i not in deleted]
+    return jsonify({"success": True, "data": result}), 200
@@ -1,46 +1,119 @@
-from collections import defaultdict
-from flask import Blueprint, jsonify, request
+from datetime import date, datetime
+from flask import Blueprint, current_app, jsonify, request
+from app.aggregates import load_completion_rates, load_streaks, load_trend_totals
 from app.auth import token_required
-from app.models import Habit, ProgressEntry
-from app.redis_client import get_cached_streak, set_cached_streak
-from app.utils import calculate_streak
+from app.data_version import conditional_get
+from app.enums import HabitFrequency
+from app.models import db, Habit
+from app.periods import get_calendar
+from app.streaks import is_period_successful
 
 stats_bp = Blueprint("stats", __name__, url_prefix="/stats")
 
+# Trend bucket sizes, finest first; oversized ranges move down this list
+TREND_GROUPS = {
+    "day": HabitFrequency.DAILY,
+    "week": HabitFrequency.WEEKLY,
+    "month": HabitFrequency.MONTHLY,
+    "year": HabitFrequency.YEARLY,
+}
+
 
 @stats_bp.route("", methods=["GET"])
 @token_required
+@conditional_get
 def get_stats():
-    streaks = {}
+    habits = Habit.query.filter_by(user_id=request.user_id).all()
+    streaks, best_streaks = load_streaks(habits)
+    if db.session.dirty:
+        # Best streaks that were calculated for the first time
+        db.session.commit()
+
+    return jsonify({"success": True, "data": streaks, "best_streaks": best_streaks})
 
+
+@stats_bp.route("/completion", methods=["GET"])
+@token_required
+@conditional_get
+def get_completion():
     habits = Habit.query.filter_by(user_id=request.user_id).all()
-    if not habits:
-        return jsonify({"success": True, "data": streaks})
+    return jsonify({"success": True, "data": load_completion_rates(habits)})
 
-    habit_ids = [habit.id for habit in habits]
 
-    progress_entries = (
-        ProgressEntry.query.filter(ProgressEntry.habit_id.in_(habit_ids))
-        .order_by(ProgressEntry.date.desc())
-        .all()
-    )
+@stats_bp.route("/trends", methods=["GET"])
+@token_required
+@conditional_get
+def get_trends():
+    habit_id = request.args.get("habit_id", type=int)
+    if not habit_id:
+        return jsonify({"success": False, "message": "Missing required fields"}), 400
+
+    habit = Habit.query.filter_by(id=habit_id, user_id=request.user_id).first()
+    if not habit:
+        return jsonify({"success": False, "message": "Habit not found or unauthorized"}), 404
 
-    # Group progress entries by habit_id
-    grouped_entries = defaultdict(list)
-    for entry in progress_entries:
-        grouped_entries[entry.habit_id].append(entry)
+    group_names = list(TREND_GROUPS)
+    default_group = next(name for name, frequency in TREND_GROUPS.items() if frequency == habit.frequency)
+    requested_group = request.args.get("group_by", default_group).lower()
+    if requested_group not in TREND_GROUPS:
+        return jsonify({
+            "success": False,
+            "message": f"Invalid group_by. Use one of: {', '.join(group_names)}.",
+        }), 400
 
-    for habit in habits:
-        # Check cache first
-        cached_streak = get_cached_streak(habit.id)
-        if cached_streak is not None:
-            streaks[habit.id] = cached_streak
+    dates = {}
+    for name in ("from", "to"):
+        value = request.args.get(name)
+        if not value:
             continue
+        try:
+            dates[name] = datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            return jsonify({"success": False, "message": f"Invalid {name} format. Use YYYY-MM-DD."}), 400
+    # Nothing is recorded after today, and later dates could run past date.max
+    end = min(dates.get("to", date.today()), date.today())
+    start = dates.get("from", min(habit.start_date, end))
+    if start > end:
+        return jsonify({"success": False, "message": "from must not be after to"}), 400
+
+    # Downsample to coarser buckets until the range fits the point budget
+    max_points = current_app.config.get("TRENDS_MAX_POINTS", 366)
+    for group_by in group_names[group_names.index(requested_group):]:
+        calendar = get_calendar(TREND_GROUPS[group_by])
+        if calendar.ordinal(end) - calendar.ordinal(start) + 1 <= max_points:
+            break
+    else:
+        return jsonify({
+            "success": False,
+            "message": f"Date range too long. At most {max_points} {group_by}s can be returned.",
+        }), 400
+
+    # Widen the range to whole buckets so the first and last totals are complete
+    frequency = TREND_GROUPS[group_by]
+    first = calendar.ordinal(start)
+    last = calendar.ordinal(end)
+    totals = load_trend_totals(
+        habit,
+        frequency,
+        calendar.start_of_ordinal(first),
+        calendar.start_of_ordinal(last + 1),
+    )
 
-        # Cache miss - calculate and cache
-        entries = grouped_entries[habit.id]
-        streak = calculate_streak(habit, entries)
-        set_cached_streak(habit.id, streak)
-        streaks[habit.id] = streak
+    period_starts = [calendar.start_of_ordinal(ordinal) for ordinal in range(first, last + 1)]
+    values = [totals.get(period_start, 0) for period_start in period_starts]
+    # Success is only defined for buckets the size of the habit's own periods
+    success = None
+    if frequency == habit.frequency:
+        success = [is_period_successful(habit, value) for value in values]
 
-    return jsonify({"success": True, "data": streaks})
+    return jsonify({
+        "success": True,
+        "data": {
+            "habit_id": habit.id,
+            "group_by": group_by,
+            "downsampled": group_by != requested_group,
+            "period_starts": [period_start.isoformat() for period_start in period_starts],
+            "totals": values,
+            "success": success,
+        },
+    })
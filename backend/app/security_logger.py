@@ -1,18 +1,273 @@
 """
 Structured security event logging for authentication and authorization events.
 
-Logs are written to stderr in JSON format for easy parsing by log aggregation
-services. Each log entry includes:
+Logs are written to stderr (or SECURITY_LOG_FILE) in JSON format for easy
+parsing by log aggregation services. Each log entry includes:
 - timestamp: ISO 8601 format
 - event: Type of security event
 - ip: Client IP address
 - Additional context (username, reason, etc.)
+
+Request threads only put entries on a bounded queue; a background thread
+serializes and writes them in batches. When the queue is full, entries are
+dropped and counted, and the count is reported in a `security_log_dropped`
+entry. Call `flush_security_log` to wait for queued entries to be written;
+this also happens at interpreter exit.
+
+With SECURITY_LOG_AGGREGATE_WINDOW set to a number of seconds, token
+validation failures and unauthorized access attempts are not written one
+by one. Repeats of the same (event, reason, ip, path) within a window are
+collapsed into one entry with a `count`, written when the window closes.
+Login and signup events are always written individually.
 """
 
+import atexit
 import json
+import os
+import queue
 import sys
+import threading
+import time
+import traceback
+import weakref
 from datetime import datetime, timezone
-from flask import request
+from typing import Optional, TextIO
+from flask import Flask, request
+
+# Most entries written in one batch
+BATCH_SIZE = 100
+
+# Entries buffered for the writer before new ones are dropped
+DEFAULT_QUEUE_SIZE = 10000
+
+# Events collapsed per window when aggregation is enabled
+AGGREGATED_EVENTS = {"token_validation_failure", "unauthorized_access"}
+
+
+class _FlushMarker:
+    """
+    Queue item that signals `done` once everything before it is written.
+
+    With `stop` set, the writer thread closes its file and exits after that.
+    """
+
+    def __init__(self, stop: bool = False):
+        self.stop = stop
+        self.done = threading.Event()
+
+
+class SecurityLogWriter:
+    """Background writer for security log entries."""
+
+    def __init__(self, queue_size: int, path: Optional[str] = None, aggregate_window: float = 0):
+        self.path = path
+        self.aggregate_window = aggregate_window
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._file: Optional[TextIO] = None
+        self._reported_drops = 0
+        self._error_reported = False
+        # Open aggregation window: summaries keyed by (event, reason, ip, path)
+        self._window: dict[tuple, dict] = {}
+        self._window_end = 0.0
+
+        if hasattr(os, "register_at_fork"):
+            ref = weakref.ref(self)
+
+            def after_fork_in_child():
+                writer = ref()
+                if writer is not None:
+                    writer._reset_after_fork()
+
+            os.register_at_fork(after_in_child=after_fork_in_child)
+
+    def _reset_after_fork(self) -> None:
+        # The child has no writer thread, and the queued entries, open window
+        # and file belong to the parent, which writes them. The lock may have
+        # been held by a parent thread at fork time, so it is replaced too.
+        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._file = None
+        self._window = {}
+        self._window_end = 0.0
+        self.dropped = 0
+        self._reported_drops = 0
+
+    def _ensure_started(self) -> None:
+        # Threads do not survive a fork, so each worker process starts its own
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="security-log", daemon=True)
+                self._thread.start()
+
+    def enqueue(self, entry: dict) -> None:
+        """Queue an entry for writing without blocking; drop it if the queue is full."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until the entries queued so far are written. False on timeout."""
+        if self._thread is None:
+            return True
+        self._ensure_started()
+        marker = _FlushMarker()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> bool:
+        """Write the queued entries, then stop the thread and close the file. False on timeout."""
+        if self._thread is None:
+            return True
+        marker = _FlushMarker(stop=True)
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        if not marker.done.wait(timeout):
+            return False
+        self._thread = None
+        return True
+
+    def _run(self) -> None:
+        while True:
+            # Wake up when the open window ends even if nothing is logged
+            timeout = max(self._window_end - time.monotonic(), 0) if self._window else None
+            try:
+                batch = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                batch = []
+            while batch and len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            markers = [item for item in batch if isinstance(item, _FlushMarker)]
+            entries = []
+            for item in batch:
+                if isinstance(item, _FlushMarker):
+                    continue
+                if self.aggregate_window > 0 and item.get("event") in AGGREGATED_EVENTS:
+                    self._aggregate(item)
+                else:
+                    entries.append(item)
+            if self._window and (markers or time.monotonic() >= self._window_end):
+                entries.extend(self._close_window())
+            self._write(entries)
+            stop = any(marker.stop for marker in markers)
+            if stop and self._file is not None:
+                self._file.close()
+                self._file = None
+            for marker in markers:
+                marker.done.set()
+            if stop:
+                return
+
+    def _aggregate(self, entry: dict) -> None:
+        if not self._window:
+            self._window_end = time.monotonic() + self.aggregate_window
+        key = (entry.get("event"), entry.get("reason"), entry.get("ip"), entry.get("path"))
+        summary = self._window.get(key)
+        if summary is None:
+            self._window[key] = {**entry, "count": 1, "last_seen": entry.get("timestamp")}
+        else:
+            summary["count"] += 1
+            summary["last_seen"] = entry.get("timestamp")
+
+    def _close_window(self) -> list[dict]:
+        summaries = [
+            {**summary, "window_seconds": self.aggregate_window}
+            for summary in self._window.values()
+        ]
+        self._window = {}
+        return summaries
+
+    def _write(self, entries: list[dict]) -> None:
+        with self._lock:
+            dropped = self.dropped - self._reported_drops
+        lines = list(entries)
+        if dropped:
+            lines.append({
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "event": "security_log_dropped",
+                "count": dropped,
+            })
+        if not lines:
+            return
+
+        try:
+            stream = self._stream()
+            stream.write("".join(json.dumps(entry, default=str) + "\n" for entry in lines))
+            stream.flush()
+        except Exception:
+            # The batch is lost: count its events as dropped (a window summary
+            # stands for `count` events) and keep the writer running
+            lost = sum(entry["count"] if "window_seconds" in entry else 1 for entry in entries)
+            with self._lock:
+                self.dropped += lost
+            if not self._error_reported:
+                self._error_reported = True
+                print("Security log write failed; further failures are only counted:", file=sys.__stderr__)
+                traceback.print_exc(file=sys.__stderr__)
+            return
+
+        with self._lock:
+            self._reported_drops += dropped
+
+    def _stream(self) -> TextIO:
+        if not self.path:
+            # Looked up on every write so a replaced sys.stderr is honoured
+            return sys.stderr
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+
+# Writes to stderr until an app configures it
+_writer = SecurityLogWriter(queue_size=DEFAULT_QUEUE_SIZE)
+
+
+def init_security_log(app: Flask) -> None:
+    """Configure the writer from the app's SECURITY_LOG_* settings."""
+    global _writer
+
+    queue_size = int(app.config.get("SECURITY_LOG_QUEUE_SIZE", DEFAULT_QUEUE_SIZE))
+    path = app.config.get("SECURITY_LOG_FILE") or None
+    aggregate_window = float(app.config.get("SECURITY_LOG_AGGREGATE_WINDOW", 0))
+    if (queue_size, path, aggregate_window) == (_writer._queue.maxsize, _writer.path, _writer.aggregate_window):
+        return
+
+    previous = _writer
+    _writer = SecurityLogWriter(queue_size, path, aggregate_window)
+    previous.close()
+
+
+def flush_security_log(timeout: float = 5.0) -> bool:
+    """Wait until queued security log entries are written. False on timeout."""
+    return _writer.flush(timeout)
+
+
+atexit.register(flush_security_log)
+
+
+def get_dropped_security_events() -> int:
+    """Number of security log entries dropped because the queue was full."""
+    return _writer.dropped
 
 
 def _get_client_ip() -> str:
@@ -31,14 +286,14 @@ def _get_client_ip() -> str:
 
 
 def _log_security_event(event: str, **kwargs) -> None:
-    """Write a structured security log entry to stderr."""
+    """Queue a structured security log entry for the background writer."""
     log_entry = {
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "event": event,
         "ip": _get_client_ip(),
         **kwargs,
     }
-    print(json.dumps(log_entry), file=sys.stderr)
+    _writer.enqueue(log_entry)
 
 
 def log_login_success(username: str, user_id: int) -> None:
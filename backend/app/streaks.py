@@ -0,0 +1,263 @@
+"""Streak calculation on integer period ordinals.
+
+Instead of stepping back one period at a time, entries are mapped to period
+ordinals once and the streak is derived from the position of the newest
+failing period. Results match `app.utils.calculate_streak_walk`.
+"""
+
+from dataclasses import dataclass, replace
+from datetime import date
+from typing import Sequence
+
+from app.enums import HabitType
+from app.models import Habit, ProgressEntry
+from app.periods import get_calendar, ordinal_to_period_start, period_ordinal
+
+
+def is_period_successful(habit: Habit, total: float) -> bool:
+    """Check whether a period total meets the habit's target."""
+    if habit.type == HabitType.ABOVE:
+        return total >= habit.target_value
+    elif habit.type == HabitType.BELOW:
+        return total <= habit.target_value
+    else:
+        raise ValueError(f"Unknown habit type {habit.type}")
+
+
+def sum_by_period(habit: Habit, progress: Sequence[ProgressEntry]) -> dict[int, float]:
+    """Sum progress values per period ordinal of the habit's frequency."""
+    ordinal_of = get_calendar(habit.frequency).ordinal
+    ordinals = [ordinal_of(entry.date) for entry in progress]
+    values = [entry.value for entry in progress]
+
+    totals: dict[int, float] = {}
+    for ordinal, value in zip(ordinals, values):
+        totals[ordinal] = totals.get(ordinal, 0) + value
+    return totals
+
+
+def calculate_streak_ordinal(habit: Habit, progress: Sequence[ProgressEntry]) -> int:
+    """
+    Calculate the current streak of a habit.
+
+    The present period only adds to the streak once it is successful; an
+    unfinished present period never breaks it. Periods before the habit's
+    start date are ignored.
+
+    Args:
+        habit: The Habit object
+        progress: ProgressEntry objects for the habit, in any order
+
+    Returns:
+        int: Number of consecutive successful periods up to the present one
+    """
+    present = period_ordinal(date.today(), habit.frequency)
+    first = period_ordinal(habit.start_date, habit.frequency)
+    if present < first:
+        return 0
+
+    totals = sum_by_period(habit, progress)
+    streak = 1 if is_period_successful(habit, totals.get(present, 0)) else 0
+
+    if is_period_successful(habit, 0):
+        # Periods without entries succeed, so only the newest failing period
+        # with entries can end the streak.
+        failures = [
+            ordinal
+            for ordinal, total in totals.items()
+            if first <= ordinal < present and not is_period_successful(habit, total)
+        ]
+        stop = max(failures, default=first - 1)
+        return streak + (present - 1 - stop)
+
+    # Periods without entries fail, so every counted period has entries.
+    successes = {
+        ordinal
+        for ordinal, total in totals.items()
+        if first <= ordinal < present and is_period_successful(habit, total)
+    }
+    ordinal = present - 1
+    while ordinal in successes:
+        streak += 1
+        ordinal -= 1
+    return streak
+
+
+def calculate_best_streak(habit: Habit, totals: dict[int, float]) -> int:
+    """
+    Calculate the longest streak a habit has ever had.
+
+    Runs one pass over the period aggregates that exist rather than over every
+    period since the start date. Follows the same rules as the current streak,
+    so the result is never smaller than it.
+
+    Args:
+        habit: The Habit object
+        totals: Progress totals keyed by period ordinal
+
+    Returns:
+        int: Length of the longest run of successful periods
+    """
+    present = period_ordinal(date.today(), habit.frequency)
+    first = period_ordinal(habit.start_date, habit.frequency)
+    if present < first:
+        return 0
+
+    if is_period_successful(habit, 0):
+        # Runs are the gaps between failing periods.
+        failures = sorted(
+            ordinal
+            for ordinal, total in totals.items()
+            if first <= ordinal <= present and not is_period_successful(habit, total)
+        )
+        boundaries = [first - 1, *failures]
+        if not failures or failures[-1] != present:
+            boundaries.append(present + 1)
+        return max(end - start - 1 for start, end in zip(boundaries, boundaries[1:]))
+
+    # Runs are consecutive successful periods.
+    successes = sorted(
+        ordinal
+        for ordinal, total in totals.items()
+        if first <= ordinal <= present and is_period_successful(habit, total)
+    )
+    best = run = 0
+    previous = None
+    for ordinal in successes:
+        run = run + 1 if previous == ordinal - 1 else 1
+        best = max(best, run)
+        previous = ordinal
+    return best
+
+
+@dataclass
+class StreakState:
+    """A current streak together with what is needed to update it without the history."""
+
+    streak: int
+    # Start of the present period when the streak was calculated
+    anchor: date
+    # Progress total of the anchor period
+    current_total: float
+    # Whether the period before the anchor succeeded
+    previous_success: bool
+    # Newest failed period before the anchor, or None if the run reaches the start date
+    break_period: date | None
+
+    def to_dict(self) -> dict:
+        return {
+            "streak": self.streak,
+            "anchor": self.anchor.isoformat(),
+            "current_total": self.current_total,
+            "previous_success": self.previous_success,
+            "break_period": self.break_period.isoformat() if self.break_period else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StreakState":
+        return cls(
+            streak=data["streak"],
+            anchor=date.fromisoformat(data["anchor"]),
+            current_total=data["current_total"],
+            previous_success=data["previous_success"],
+            break_period=date.fromisoformat(data["break_period"]) if data["break_period"] else None,
+        )
+
+
+def _make_state(habit: Habit, run: int, present: int, current_total: float, break_ordinal: int | None) -> StreakState:
+    first = period_ordinal(habit.start_date, habit.frequency)
+    present_success = present >= first and is_period_successful(habit, current_total)
+    return StreakState(
+        streak=run + (1 if present_success else 0),
+        anchor=ordinal_to_period_start(present, habit.frequency),
+        current_total=current_total,
+        previous_success=run > 0,
+        break_period=(
+            ordinal_to_period_start(break_ordinal, habit.frequency)
+            if break_ordinal is not None and break_ordinal >= first
+            else None
+        ),
+    )
+
+
+def build_streak_state(
+    habit: Habit, streak: int, current_total: float, today: date | None = None
+) -> StreakState:
+    """
+    Describe a freshly calculated streak.
+
+    Args:
+        habit: The Habit object
+        streak: The current streak, as returned by calculate_streak
+        current_total: Progress total of the present period
+        today: Reference date (defaults to today)
+    """
+    present = period_ordinal(today or date.today(), habit.frequency)
+    first = period_ordinal(habit.start_date, habit.frequency)
+    present_success = present >= first and is_period_successful(habit, current_total)
+    run = streak - (1 if present_success else 0)
+    return _make_state(habit, run, present, current_total, present - run - 1)
+
+
+def apply_period_total(
+    habit: Habit, state: StreakState, period_start: date, total: float, today: date | None = None
+) -> StreakState | None:
+    """
+    Update a streak state after a period's total changed.
+
+    Returns None when the change falls inside the counted run, where only a
+    full recalculation can tell whether the run still holds.
+    """
+    frequency = habit.frequency
+    present = period_ordinal(today or date.today(), frequency)
+    if period_ordinal(state.anchor, frequency) != present:
+        return None
+
+    ordinal = period_ordinal(period_start, frequency)
+    first = period_ordinal(habit.start_date, frequency)
+    if ordinal == present:
+        present_success = present >= first and is_period_successful(habit, state.current_total)
+        run = state.streak - (1 if present_success else 0)
+        break_ordinal = period_ordinal(state.break_period, frequency) if state.break_period else None
+        return _make_state(habit, run, present, total, break_ordinal)
+
+    # Periods before the break or before the start date cannot reach the current run
+    if ordinal < first:
+        return state
+    if state.break_period is not None and ordinal < period_ordinal(state.break_period, frequency):
+        return state
+    return None
+
+
+def advance_streak_state(habit: Habit, state: StreakState, today: date | None = None) -> StreakState | None:
+    """
+    Roll a streak state forward to the present period.
+
+    Periods that ended since the state was built had no writes after it
+    (writes to them update or drop the state), so their outcome follows from
+    the stored total or from an empty total. Returns None if the state cannot
+    be rolled forward.
+    """
+    frequency = habit.frequency
+    present = period_ordinal(today or date.today(), frequency)
+    anchor = period_ordinal(state.anchor, frequency)
+    if anchor == present:
+        return state
+    if anchor > present or anchor < period_ordinal(habit.start_date, frequency):
+        return None
+
+    break_ordinal = period_ordinal(state.break_period, frequency) if state.break_period else None
+    anchor_success = is_period_successful(habit, state.current_total)
+    run = state.streak - (1 if anchor_success else 0)
+    if anchor_success:
+        run += 1
+    else:
+        run, break_ordinal = 0, anchor
+
+    skipped = present - anchor - 1
+    if skipped and is_period_successful(habit, 0):
+        run += skipped
+    elif skipped:
+        run, break_ordinal = 0, present - 1
+
+    return _make_state(habit, run, present, 0, break_ordinal)
@@ -1,8 +1,14 @@
-from datetime import date, timedelta
+from datetime import date
 from typing import Sequence
 
+from flask import current_app, has_app_context
+
 from app.enums import HabitFrequency, HabitType
 from app.models import Habit, ProgressEntry
+from app.periods import get_calendar
+from app.streaks import calculate_streak_ordinal
+
+DEFAULT_STREAK_ENGINE = "ordinal"
 
 
 def filter_progress_to_current_period(
@@ -27,10 +33,9 @@ def filter_progress_to_current_period(
         reference_date = date.today()
 
     # Calculate date ranges for each habit
-    habit_date_ranges = {}
-    for habit in habits:
-        start_date, end_date = get_date_range(reference_date, habit.frequency)
-        habit_date_ranges[habit.id] = (start_date, end_date)
+    habit_date_ranges = {
+        habit.id: get_date_range(reference_date, habit.frequency) for habit in habits
+    }
 
     # Initialize result with empty lists for each habit
     result: dict[int, list[ProgressEntry]] = {habit.id: [] for habit in habits}
@@ -51,23 +56,7 @@ def get_date_range(current_date: date, frequency: HabitFrequency) -> tuple[date,
     # Returns a range matching the frequency.
     # Start is inclusive, end is exclusive.
 
-    match frequency:
-        case HabitFrequency.DAILY:
-            start = current_date
-            end = current_date + timedelta(days=1)
-        case HabitFrequency.WEEKLY:
-            start = current_date - timedelta(days=current_date.weekday())
-            end = start + timedelta(days=7)
-        case HabitFrequency.MONTHLY:
-            start = date(current_date.year, current_date.month, 1)
-            if current_date.month == 12:
-                end = date(current_date.year + 1, 1, 1)
-            else:
-                end = date(current_date.year, current_date.month + 1, 1)
-        case HabitFrequency.YEARLY:
-            start = date(current_date.year, 1, 1)
-            end = date(current_date.year + 1, 1, 1)
-    return start, end
+    return get_calendar(frequency).period_range(current_date)
 
 
 def calculate_habit_completion(habit: Habit, progress_entries: list[ProgressEntry]) -> bool:
@@ -91,22 +80,52 @@ def calculate_habit_completion(habit: Habit, progress_entries: list[ProgressEntr
         raise ValueError(f"Unknown habit type {habit.type}")
 
 
-def calculate_streak(habit: Habit, progress: list[ProgressEntry]) -> int:
+def calculate_streak(
+    habit: Habit, progress: list[ProgressEntry], engine: str | None = None
+) -> int:
+    """
+    Calculate the current streak of a habit with the selected engine.
+
+    Args:
+        habit: The Habit object
+        progress: List of ProgressEntry objects, from newest to oldest
+        engine: "ordinal" or "walk". Defaults to the STREAK_ENGINE config value.
+
+    Returns:
+        int: The current streak
+    """
+    if engine is None:
+        engine = (
+            current_app.config.get("STREAK_ENGINE", DEFAULT_STREAK_ENGINE)
+            if has_app_context()
+            else DEFAULT_STREAK_ENGINE
+        )
+
+    if engine == "ordinal":
+        return calculate_streak_ordinal(habit, progress)
+    elif engine == "walk":
+        return calculate_streak_walk(habit, progress)
+    else:
+        raise ValueError(f"Unknown streak engine {engine}")
+
+
+def calculate_streak_walk(habit: Habit, progress: list[ProgressEntry]) -> int:
     # Assumes the ProgressEntry list in reverse order: from newest to oldest.
     streak = 0
 
+    calendar = get_calendar(habit.frequency)
     today = date.today()
-    present_start, _ = get_date_range(today, habit.frequency)
+    present_start = calendar.period_start(today)
 
     current_range_start = present_start
 
     progress_by_period = {}
     progress_by_period[current_range_start] = 0
 
-    start_date_period, _ = get_date_range(habit.start_date, habit.frequency)
+    start_date_period = calendar.period_start(habit.start_date)
 
     for entry in progress:
-        period_start, _ = get_date_range(entry.date, habit.frequency)
+        period_start = calendar.period_start(entry.date)
         progress_by_period.setdefault(period_start, 0)
         progress_by_period[period_start] += entry.value
 
@@ -130,8 +149,6 @@ def calculate_streak(habit: Habit, progress: list[ProgressEntry]) -> int:
             pass
 
         # Move backwards one period.
-        current_range_start, _ = get_date_range(
-            current_range_start - timedelta(days=1), habit.frequency
-        )
+        current_range_start = calendar.previous_start(current_range_start)
     
     return streak
\ No newline at end of file
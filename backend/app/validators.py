@@ -80,6 +80,10 @@ def validate_date_string(date_str: Optional[str]) -> Tuple[bool, Optional[str],
         parsed_date is None if date_str is None (will use current date).
         error_message is None if valid.
     """
+    if date_str is None:
+        return True, None, None
+    if not isinstance(date_str, str):
+        return False, "Invalid date format. Use YYYY-MM-DD.", None
     if not date_str:
         return True, None, None
 
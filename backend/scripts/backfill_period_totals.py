@@ -0,0 +1,23 @@
+"""Rebuild the habit_period_total table from existing progress entries.
+
+The migration that adds the table fills it; run this to repair the totals
+if they ever drift from the progress entries:
+    python scripts/backfill_period_totals.py
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import create_app, db
+from app.aggregates import rebuild_all_period_totals
+from app.models import HabitPeriodTotal
+
+app = create_app()
+
+with app.app_context():
+    rebuild_all_period_totals()
+    db.session.commit()
+
+    print(f"Rebuilt {HabitPeriodTotal.query.count()} period totals.")
@@ -0,0 +1,43 @@
+"""Compare uncached period lookups with the memoized PeriodCalendar.
+
+Usage: python scripts/benchmark_periods.py [years] [entries_per_day]
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import datetime
+import timeit
+
+from app.enums import HabitFrequency
+from app.periods import PeriodCalendar, _compute_period_range
+
+years = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+today = datetime.date.today()
+start_date = today - datetime.timedelta(days=365 * years)
+
+days = []
+day = today
+while day >= start_date:
+    days.extend([day] * per_day)
+    day -= datetime.timedelta(days=1)
+
+print(f"History: {years} years, {len(days)} entry dates")
+print(f"{'frequency':<12}{'uncached ms':>13}{'cached ms':>11}{'speedup':>10}{'hit rate':>10}")
+
+for frequency in HabitFrequency:
+    calendar = PeriodCalendar(frequency)
+    assert all(calendar.period_range(d) == _compute_period_range(d, frequency) for d in days)
+
+    runs = 10
+    uncached_ms = timeit.timeit(
+        lambda: [_compute_period_range(d, frequency) for d in days], number=runs
+    ) / runs * 1000
+    cached_ms = timeit.timeit(lambda: [calendar.period_range(d) for d in days], number=runs) / runs * 1000
+
+    info = calendar.cache_info()["period_range"]
+    hit_rate = info["hits"] / (info["hits"] + info["misses"])
+    print(f"{frequency.name:<12}{uncached_ms:>13.2f}{cached_ms:>11.2f}{uncached_ms / cached_ms:>9.1f}x{hit_rate:>10.1%}")
@@ -0,0 +1,58 @@
+"""Compare the streak engines on long synthetic histories.
+
+Usage: python scripts/benchmark_streaks.py [years]
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import datetime
+import random
+import timeit
+from types import SimpleNamespace
+
+from app.enums import HabitType, HabitFrequency
+from app.streaks import calculate_streak_ordinal
+from app.utils import calculate_streak_walk
+
+years = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+today = datetime.date.today()
+start_date = today - datetime.timedelta(days=365 * years)
+rng = random.Random(42)
+
+scenarios = [
+    # BELOW habit that never failed: the walk visits every day back to start_date.
+    ("daily below, no failures", HabitType.BELOW, HabitFrequency.DAILY, 5, 0.0),
+    ("daily above, mostly done", HabitType.ABOVE, HabitFrequency.DAILY, 1, 0.02),
+    ("weekly above", HabitType.ABOVE, HabitFrequency.WEEKLY, 3, 0.0),
+    ("monthly below", HabitType.BELOW, HabitFrequency.MONTHLY, 40, 0.0),
+]
+
+print(f"History: {years} years ({(today - start_date).days + 1} days)")
+print(f"{'scenario':<28}{'entries':>9}{'walk ms':>11}{'ordinal ms':>13}{'speedup':>10}")
+
+for name, habit_type, frequency, target, miss_rate in scenarios:
+    habit = SimpleNamespace(
+        type=habit_type, frequency=frequency, target_value=target, start_date=start_date
+    )
+
+    entries = []
+    day = today
+    while day >= start_date:
+        if habit_type == HabitType.BELOW:
+            value = rng.randint(0, 1)
+        else:
+            value = 0 if rng.random() < miss_rate else target
+        entries.append(SimpleNamespace(date=day, value=value))
+        day -= datetime.timedelta(days=1)
+
+    walk = calculate_streak_walk(habit, entries)
+    ordinal = calculate_streak_ordinal(habit, entries)
+    assert walk == ordinal, f"{name}: walk={walk} ordinal={ordinal}"
+
+    runs = 20
+    walk_ms = timeit.timeit(lambda: calculate_streak_walk(habit, entries), number=runs) / runs * 1000
+    ordinal_ms = timeit.timeit(lambda: calculate_streak_ordinal(habit, entries), number=runs) / runs * 1000
+    print(f"{name:<28}{len(entries):>9}{walk_ms:>11.2f}{ordinal_ms:>13.2f}{walk_ms / ordinal_ms:>9.1f}x")
@@ -0,0 +1,40 @@
+"""Pick the bcrypt cost that fits a target hash time on this host.
+
+Each extra round doubles the work, so this times increasing costs and
+reports the highest one whose median hash time stays within the target.
+
+Usage: python scripts/calibrate_bcrypt.py [target_ms] [samples]
+"""
+
+import statistics
+import sys
+import time
+
+import bcrypt
+
+MIN_ROUNDS = 4
+MAX_ROUNDS = 31
+
+target_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 250
+samples = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+password = b"calibration-password"
+
+print(f"Target: {target_ms:.0f} ms per hash, median of {samples}")
+print(f"{'rounds':>6}{'ms':>10}")
+
+chosen = MIN_ROUNDS
+for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+    salt = bcrypt.gensalt(rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.hashpw(password, salt)
+        timings.append((time.perf_counter() - start) * 1000)
+    elapsed_ms = statistics.median(timings)
+    print(f"{rounds:>6}{elapsed_ms:>10.1f}")
+
+    if elapsed_ms > target_ms:
+        break
+    chosen = rounds
+
+print(f"\nBCRYPT_ROUNDS={chosen}")
@@ -6,6 +6,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../a
 from app import create_app, db
 from app.enums import HabitType, HabitFrequency
 from app.models import User, Habit, ProgressEntry
+from app.aggregates import rebuild_period_totals
 import random
 import datetime
 
@@ -61,4 +62,8 @@ with app.app_context():
 
     db.session.commit()
 
+    for habit in habits:
+        rebuild_period_totals(habit)
+    db.session.commit()
+
     print("Test data populated!")
@@ -8,6 +8,7 @@ from werkzeug.security import generate_password_hash
 from app import create_app
 from app.auth import create_access_token
 from app.models import db, Habit, User, ProgressEntry
+from app.security_logger import flush_security_log
 from app.enums import HabitType, HabitFrequency  # Adjust imports if needed
 
 
@@ -16,6 +17,7 @@ class TestConfig:
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     RATELIMIT_ENABLED = False
+    BCRYPT_ROUNDS = 4
 
 
 class TestConfigWithRateLimit(TestConfig):
@@ -28,6 +30,27 @@ class TestConfigProduction(TestConfig):
     pass  # ENVIRONMENT is set via monkeypatch in fixture
 
 
+# Security events are written by a background thread. Flush at the end of
+# each test phase, while pytest still captures output, so late writes do not
+# land in the test report.
+@pytest.hookimpl(hookwrapper=True, trylast=True)
+def pytest_runtest_setup(item):
+    yield
+    flush_security_log()
+
+
+@pytest.hookimpl(hookwrapper=True, trylast=True)
+def pytest_runtest_call(item):
+    yield
+    flush_security_log()
+
+
+@pytest.hookimpl(hookwrapper=True, trylast=True)
+def pytest_runtest_teardown(item):
+    yield
+    flush_security_log()
+
+
 @pytest.fixture
 def app():
     app = create_app(TestConfig())
@@ -0,0 +1,127 @@
+"""Tests for the per-period progress aggregate table."""
+
+import pytest
+from collections import defaultdict
+from datetime import date, timedelta
+
+from app.aggregates import (
+    load_current_period_totals,
+    load_period_totals,
+    rebuild_all_period_totals,
+    rebuild_period_totals,
+)
+from app.enums import HabitFrequency, HabitType
+from app.models import db, Habit, HabitPeriodTotal, ProgressEntry
+from app.utils import get_date_range
+
+
+def _totals(habit_id):
+    return {
+        row.period_start: (row.total, row.entry_count)
+        for row in HabitPeriodTotal.query.filter_by(habit_id=habit_id)
+    }
+
+
+def test_progress_writes_maintain_period_totals(client, test_habits, test_auth_headers):
+    habit = test_habits[1]  # Weekly
+    monday = date(2024, 5, 6)
+
+    ids = []
+    for day, value in [(monday, 10), (monday + timedelta(days=3), 5), (monday + timedelta(days=7), 2)]:
+        response = client.post(
+            "/api/progress",
+            json={"habit_id": habit.id, "date": day.isoformat(), "value": value},
+            headers=test_auth_headers,
+        )
+        ids.append(response.get_json()["data"]["id"])
+
+    assert _totals(habit.id) == {monday: (15, 2), monday + timedelta(days=7): (2, 1)}
+
+    client.delete(f"/api/progress/{ids[0]}", headers=test_auth_headers)
+    client.delete(f"/api/progress/{ids[2]}", headers=test_auth_headers)
+
+    # Rows disappear with their last entry
+    assert _totals(habit.id) == {monday: (5, 1)}
+
+
+def test_rebuild_period_totals(app, test_habits):
+    habit = test_habits[1]  # Weekly
+    db.session.add_all([
+        ProgressEntry(habit_id=habit.id, date=date(2024, 5, 7), value=1),
+        ProgressEntry(habit_id=habit.id, date=date(2024, 5, 12), value=2),
+        ProgressEntry(habit_id=habit.id, date=date(2024, 5, 13), value=4),
+    ])
+    db.session.add(HabitPeriodTotal(habit_id=habit.id, period_start=date(2020, 1, 6), total=9, entry_count=1))
+    db.session.commit()
+
+    rebuild_period_totals(habit)
+    db.session.commit()
+
+    assert _totals(habit.id) == {date(2024, 5, 6): (3, 2), date(2024, 5, 13): (4, 1)}
+    rows = load_period_totals([habit.id])[habit.id]
+    assert [(row.date, row.value) for row in rows] == [(date(2024, 5, 13), 4), (date(2024, 5, 6), 3)]
+
+
+def test_load_current_period_totals_matches_each_frequency(app, test_habits):
+    daily, weekly = test_habits[0], test_habits[1]
+    reference = date(2024, 5, 8)  # Wednesday; the week starts on 2024-05-06
+    db.session.add_all([
+        # Shares the weekly period start but is not the daily habit's current day
+        HabitPeriodTotal(habit_id=daily.id, period_start=date(2024, 5, 6), total=4, entry_count=1),
+        HabitPeriodTotal(habit_id=daily.id, period_start=reference, total=1, entry_count=1),
+        HabitPeriodTotal(habit_id=weekly.id, period_start=date(2024, 5, 6), total=7, entry_count=2),
+    ])
+    db.session.commit()
+
+    totals = load_current_period_totals([daily, weekly], reference_date=reference)
+
+    assert totals == {daily.id: 1, weekly.id: 7}
+
+
+def test_frequency_change_rebuilds_period_totals(client, test_habits, test_auth_headers):
+    habit = test_habits[0]  # Daily
+    for day in ("2024-05-06", "2024-05-08"):
+        client.post(
+            "/api/progress",
+            json={"habit_id": habit.id, "date": day, "value": 1},
+            headers=test_auth_headers,
+        )
+
+    response = client.patch(
+        f"/api/habits/{habit.id}", json={"frequency": "weekly"}, headers=test_auth_headers
+    )
+
+    assert response.status_code == 200
+    assert db.session.get(Habit, habit.id).frequency.name == "WEEKLY"
+    assert _totals(habit.id) == {date(2024, 5, 6): (2, 2)}
+
+
+@pytest.mark.parametrize("frequency", list(HabitFrequency))
+def test_sql_period_grouping_matches_date_range(app, test_user, frequency):
+    """Grouping by the SQL period key gives the same periods as get_date_range."""
+    habit = Habit(
+        name="Grouped",
+        type=HabitType.ABOVE,
+        target_value=1,
+        frequency=frequency,
+        start_date=date(2023, 1, 1),
+        user_id=test_user.id,
+    )
+    db.session.add(habit)
+    db.session.commit()
+
+    days = [date(2023, 12, 24) + timedelta(days=offset * 3) for offset in range(40)]
+    db.session.add_all(ProgressEntry(habit_id=habit.id, date=day, value=1) for day in days)
+    db.session.commit()
+
+    expected = defaultdict(lambda: (0, 0))
+    for day in days:
+        start, _ = get_date_range(day, frequency)
+        total, count = expected[start]
+        expected[start] = (total + 1, count + 1)
+
+    rebuild_all_period_totals()
+    db.session.commit()
+
+    assert _totals(habit.id) == dict(expected)
+    assert db.session.get(Habit, habit.id).best_streak is None
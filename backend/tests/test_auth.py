@@ -1,5 +1,13 @@
 import pytest
 import time
+from datetime import datetime
+
+import bcrypt
+from werkzeug.security import generate_password_hash
+
+from app.auth import password_needs_rehash
+from app.hashing import HashingUnavailable, get_hash_pool
+from app.models import RefreshToken, User, db
 
 
 @pytest.mark.parametrize(
@@ -156,3 +164,156 @@ def test_no_https_enforcement_in_development(client):
     )
     # Should not redirect - will be 401 (no auth) but not 301
     assert response.status_code != 301
+
+
+def test_login_returns_503_when_hashing_is_at_capacity(client, monkeypatch):
+    """A full bcrypt pool turns logins away straight away instead of queueing them"""
+    client.post("/api/auth/signup", json={"username": "busyuser", "password": "ValidPass123"})
+
+    def reject(*args):
+        raise HashingUnavailable("Password hashing is at capacity")
+
+    monkeypatch.setattr(get_hash_pool(), "run", reject)
+    response = client.post(
+        "/api/auth/login",
+        json={"username": "busyuser", "password": "ValidPass123"},
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.get_json()["success"] is False
+
+
+def test_login_rehashes_password_with_configured_cost(app, client):
+    """A hash made with another cost is replaced after a successful login"""
+    old_hash = bcrypt.hashpw(b"ValidPass123", bcrypt.gensalt(rounds=5))
+    user = User(username="olduser", password=old_hash)
+    db.session.add(user)
+    db.session.commit()
+
+    response = client.post(
+        "/api/auth/login",
+        json={"username": "olduser", "password": "ValidPass123"},
+    )
+
+    assert response.status_code == 200
+    db.session.refresh(user)
+    assert user.password != old_hash
+    assert user.password.startswith(b"$2b$04$")
+    assert bcrypt.checkpw(b"ValidPass123", user.password)
+
+
+def test_password_needs_rehash(app):
+    """Only bcrypt hashes with a different cost are flagged"""
+    assert password_needs_rehash(bcrypt.hashpw(b"pw", bcrypt.gensalt(rounds=5))) is True
+    assert password_needs_rehash(bcrypt.hashpw(b"pw", bcrypt.gensalt(rounds=4))) is False
+    assert password_needs_rehash(generate_password_hash("pw").encode("utf-8")) is False
+
+
+def _login(client, username="refreshuser"):
+    client.post("/api/auth/signup", json={"username": username, "password": "ValidPass123"})
+    response = client.post("/api/auth/login", json={"username": username, "password": "ValidPass123"})
+    return response.get_json()["data"]
+
+
+def test_login_returns_refresh_token(client):
+    """Login hands out a refresh token next to the access token"""
+    data = _login(client)
+
+    assert data["token"]
+    assert data["refresh_token"]
+
+
+def test_refresh_rotates_tokens(client):
+    """A refresh token is exchanged once for a new access and refresh token"""
+    data = _login(client)
+
+    response = client.post("/api/auth/refresh", json={"refresh_token": data["refresh_token"]})
+    assert response.status_code == 200
+    refreshed = response.get_json()["data"]
+    assert refreshed["user_id"] == data["user_id"]
+    assert refreshed["refresh_token"] != data["refresh_token"]
+
+    verify = client.get("/api/auth/verify", headers={"Authorization": f"Bearer {refreshed['token']}"})
+    assert verify.status_code == 200
+
+    # The old refresh token was used up
+    reused = client.post("/api/auth/refresh", json={"refresh_token": data["refresh_token"]})
+    assert reused.status_code == 401
+
+    again = client.post("/api/auth/refresh", json={"refresh_token": refreshed["refresh_token"]})
+    assert again.status_code == 200
+
+
+def test_refresh_does_not_check_password(client, monkeypatch):
+    """Renewing a session never runs bcrypt"""
+    data = _login(client)
+
+    def fail(*args):
+        raise AssertionError("bcrypt was called")
+
+    monkeypatch.setattr(get_hash_pool(), "run", fail)
+    response = client.post("/api/auth/refresh", json={"refresh_token": data["refresh_token"]})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("payload", [{}, {"refresh_token": "unknown"}, {"refresh_token": 5}])
+def test_refresh_rejects_invalid_tokens(client, payload):
+    """Unknown or malformed refresh tokens get a 401"""
+    response = client.post("/api/auth/refresh", json=payload)
+
+    assert response.status_code == 401
+    assert response.get_json()["success"] is False
+
+
+def test_refresh_rejects_expired_token(app, client):
+    """Refresh tokens past their expiry are rejected and removed"""
+    data = _login(client)
+    RefreshToken.query.update({"expires_at": datetime(2000, 1, 1)})
+    db.session.commit()
+
+    response = client.post("/api/auth/refresh", json={"refresh_token": data["refresh_token"]})
+
+    assert response.status_code == 401
+    # Only the token issued at signup is left
+    assert RefreshToken.query.count() == 1
+
+
+def test_logout_revokes_refresh_token(client):
+    """A refresh token cannot be used after logging out"""
+    data = _login(client)
+
+    response = client.post("/api/auth/logout", json={"refresh_token": data["refresh_token"]})
+    assert response.status_code == 200
+
+    refreshed = client.post("/api/auth/refresh", json={"refresh_token": data["refresh_token"]})
+    assert refreshed.status_code == 401
+
+
+def test_logout_without_refresh_token(client):
+    """Logging out without a refresh token still succeeds"""
+    response = client.post("/api/auth/logout", json={})
+
+    assert response.status_code == 200
+
+
+def test_health_is_a_plain_liveness_check(client):
+    """The public health check does not reveal the hashing pool's load"""
+    response = client.get("/api/health")
+
+    assert response.status_code == 200
+    assert response.get_json() == {"success": True}
+
+
+def test_hashing_metrics_require_authentication(client, test_auth_headers):
+    """Hash latency and queue wait of the bcrypt pool are only shown to authenticated callers"""
+    client.post("/api/auth/signup", json={"username": "metricsuser", "password": "ValidPass123"})
+
+    assert client.get("/api/health/hashing").status_code == 401
+    response = client.get("/api/health/hashing", headers=test_auth_headers)
+
+    assert response.status_code == 200
+    hashing = response.get_json()["data"]
+    assert hashing["hash_time"]["count"] >= 1
+    assert hashing["queue_wait"]["count"] >= 1
+    assert {"workers", "queue_size", "in_flight", "rejected"} <= set(hashing)
@@ -2,6 +2,7 @@
 
 import pytest
 from datetime import datetime, timedelta, timezone
+import threading
 from unittest.mock import patch, MagicMock
 import jwt
 
@@ -12,7 +13,10 @@ from app.auth import (
     create_access_token,
     decode_token,
     token_required,
+    get_token_cache,
+    TokenCache,
 )
+from app.hashing import HashPool, HashingUnavailable, get_hash_pool
 
 
 class TestConfig:
@@ -57,6 +61,63 @@ class TestPasswordHashing:
         assert check_password("wrongpassword", hashed) is False
 
 
+class TestHashPool:
+    """Tests for the bounded bcrypt pool."""
+
+    def test_records_hash_time_and_queue_wait(self):
+        """Test that each call is counted in the pool metrics."""
+        pool = HashPool(workers=1, queue_size=1)
+        assert pool.run(pow, 2, 10) == 1024
+
+        metrics = pool.metrics()
+        assert metrics["hash_time"]["count"] == 1
+        assert metrics["queue_wait"]["count"] == 1
+        assert metrics["in_flight"] == 0
+        assert metrics["rejected"] == 0
+
+    def test_rejects_calls_beyond_queue_cap(self):
+        """Test that HashingUnavailable is raised once workers and queue are full."""
+        pool = HashPool(workers=1, queue_size=1)
+        release = threading.Event()
+        started = threading.Barrier(3)
+
+        def blocked():
+            started.wait()
+            pool.run(release.wait)
+
+        threads = [threading.Thread(target=blocked) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        started.wait()
+        # Give both threads time to take their slots
+        for _ in range(100):
+            if pool.metrics()["in_flight"] == 2:
+                break
+            threading.Event().wait(0.01)
+
+        with pytest.raises(HashingUnavailable):
+            pool.run(pow, 2, 2)
+
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert pool.metrics()["rejected"] == 1
+        assert pool.run(pow, 2, 2) == 4
+
+    def test_pool_is_sized_from_app_config(self):
+        """Test that each app builds its pool from BCRYPT_WORKERS and BCRYPT_QUEUE_SIZE."""
+
+        class SmallPoolConfig(TestConfig):
+            BCRYPT_WORKERS = 2
+            BCRYPT_QUEUE_SIZE = 3
+
+        app = create_app(SmallPoolConfig)
+        with app.app_context():
+            pool = get_hash_pool()
+            assert (pool.workers, pool.queue_size) == (2, 3)
+        assert get_hash_pool() is not pool
+
+
 class TestCreateAccessToken:
     """Tests for create_access_token function."""
 
@@ -139,6 +200,68 @@ class TestDecodeToken:
             assert "Invalid token" in str(exc_info.value)
 
 
+class TestTokenCache:
+    """Tests for the verified-token cache."""
+
+    def test_repeated_decode_is_served_from_cache(self):
+        """Test that only the first decode of a token verifies it."""
+        app = create_app(TestConfig)
+        with app.app_context():
+            token = create_access_token(7)
+            with patch("app.auth.jwt.decode", wraps=jwt.decode) as decode:
+                for _ in range(3):
+                    assert decode_token(token)["sub"] == 7
+            assert decode.call_count == 1
+            info = get_token_cache().info()
+        assert info["hits"] == 2
+        assert info["misses"] == 1
+
+    def test_cache_is_sized_from_app_config(self):
+        """Test that TOKEN_CACHE_SIZE sizes the app's cache and 0 disables it."""
+
+        class NoCacheConfig(TestConfig):
+            TOKEN_CACHE_SIZE = 0
+
+        app = create_app(NoCacheConfig)
+        with app.app_context():
+            token = create_access_token(7)
+            with patch("app.auth.jwt.decode", wraps=jwt.decode) as decode:
+                decode_token(token)
+                decode_token(token)
+            assert decode.call_count == 2
+            assert get_token_cache().info()["max_size"] == 0
+
+    def test_cache_is_keyed_by_secret_key(self):
+        """Test that a token cached under one key is rejected under another."""
+        app = create_app(TestConfig)
+        with app.app_context():
+            token = create_access_token(7)
+            decode_token(token)
+            app.config["SECRET_KEY"] = "rotated-secret-key"
+            with pytest.raises(ValueError, match="Invalid token"):
+                decode_token(token)
+
+    def test_entries_expire_with_token(self):
+        """Test that an entry past its exp is treated as a miss."""
+        cache = TokenCache(max_size=4)
+        cache.put("key", {"sub": 1, "exp": datetime.now(timezone.utc).timestamp() - 1})
+        assert cache.get("key") is None
+        assert cache.info()["size"] == 0
+
+    def test_size_is_bounded(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = TokenCache(max_size=2)
+        exp = (datetime.now(timezone.utc) + timedelta(hours=1)).timestamp()
+        cache.put("a", {"sub": 1, "exp": exp})
+        cache.put("b", {"sub": 2, "exp": exp})
+        cache.get("a")
+        cache.put("c", {"sub": 3, "exp": exp})
+
+        assert cache.get("b") is None
+        assert cache.get("a")["sub"] == 1
+        assert cache.info()["size"] == 2
+
+
 class TestTokenRequiredDecorator:
     """Tests for token_required decorator."""
 
@@ -0,0 +1,76 @@
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from app.models import db
+
+
+def test_get_dashboard(client, test_habits, test_auth_headers):
+    daily, weekly = test_habits[0], test_habits[1]
+    today = date.today()
+    daily.start_date = today - timedelta(days=5)
+    db.session.commit()
+    for habit, day, value in [
+        (daily, today, 1),
+        (daily, today - timedelta(days=1), 1),
+        (weekly, today, 10),
+        (weekly, today - timedelta(days=7), 40),  # Previous week
+    ]:
+        client.post(
+            "/api/progress",
+            json={"habit_id": habit.id, "date": day.isoformat(), "value": value},
+            headers=test_auth_headers,
+        )
+
+    res = client.get("/api/dashboard", headers=test_auth_headers)
+    data = res.get_json()["data"]
+
+    assert res.status_code == 200
+    habits = {habit["id"]: habit for habit in data["habits"]}
+    assert set(habits) == {daily.id, weekly.id}
+    assert habits[daily.id]["is_completed"] is True
+    assert habits[weekly.id]["current_total"] == 10
+    assert habits[weekly.id]["is_completed"] is False
+    assert sorted((p["habit_id"], p["value"]) for p in data["progress"]) == [(daily.id, 1), (weekly.id, 10)]
+    assert data["streaks"][str(daily.id)] == 2
+    assert data["best_streaks"][str(daily.id)] == 2
+
+
+def test_get_dashboard_matches_separate_endpoints(client, test_habits, test_auth_headers):
+    client.post("/api/progress", json={"habit_id": test_habits[1].id, "value": 5}, headers=test_auth_headers)
+
+    dashboard = client.get("/api/dashboard", headers=test_auth_headers).get_json()["data"]
+    habits = client.get("/api/habits", headers=test_auth_headers).get_json()["data"]
+    progress = client.get("/api/progress", headers=test_auth_headers).get_json()["data"]
+    stats = client.get("/api/stats", headers=test_auth_headers).get_json()
+
+    assert dashboard["habits"] == habits
+    assert dashboard["progress"] == progress
+    assert dashboard["streaks"] == stats["data"]
+    assert dashboard["best_streaks"] == stats["best_streaks"]
+
+
+def test_get_dashboard_query_count(client, test_habits, test_auth_headers):
+    """One habit query, one progress query and one period-totals query for cache misses."""
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        client.get("/api/dashboard", headers=test_auth_headers)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+    selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    assert len([s for s in selects if "FROM habit " in s or s.rstrip().endswith("FROM habit")]) <= 1
+    assert len([s for s in selects if "progress_entry" in s]) == 1
+    assert len([s for s in selects if "habit_period_total" in s]) == 1
+
+
+def test_get_dashboard_without_habits(client, test_auth_headers):
+    res = client.get("/api/dashboard", headers=test_auth_headers)
+
+    assert res.get_json()["data"] == {"habits": [], "progress": [], "streaks": {}, "best_streaks": {}}
+
+
+def test_get_dashboard_requires_token(client):
+    assert client.get("/api/dashboard").status_code == 401
@@ -0,0 +1,101 @@
+"""Tests for per-user data versions and conditional GETs."""
+
+import pytest
+from sqlalchemy import event
+
+from app.models import db, User
+
+
+def _version(user_id):
+    return db.session.execute(db.select(User.data_version).where(User.id == user_id)).scalar()
+
+
+@pytest.mark.parametrize("path", ["/api/habits", "/api/progress", "/api/stats"])
+def test_matching_etag_returns_not_modified(client, test_habits, test_auth_headers, path):
+    first = client.get(path, headers=test_auth_headers)
+    etag = first.headers["ETag"]
+
+    second = client.get(path, headers={**test_auth_headers, "If-None-Match": etag})
+
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+    assert second.data == b""
+
+
+def test_not_modified_skips_data_queries(client, test_habits, test_auth_headers, monkeypatch):
+    """With the version cached, an unchanged poll issues no queries at all."""
+    monkeypatch.setattr("app.data_version.get_cached_data_version", lambda user_id: 0)
+    etag = client.get("/api/habits", headers=test_auth_headers).headers["ETag"]
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        response = client.get("/api/habits", headers={**test_auth_headers, "If-None-Match": etag})
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+    assert response.status_code == 304
+    assert statements == []
+
+
+def test_writes_bump_data_version(client, test_user, test_habits, test_auth_headers):
+    habit = test_habits[0]
+    etag = client.get("/api/habits", headers=test_auth_headers).headers["ETag"]
+
+    response = client.post(
+        "/api/progress", json={"habit_id": habit.id, "value": 1}, headers=test_auth_headers
+    )
+    entry_id = response.get_json()["data"]["id"]
+    client.patch(f"/api/habits/{habit.id}", json={"name": "Water"}, headers=test_auth_headers)
+    client.delete(f"/api/progress/{entry_id}", headers=test_auth_headers)
+    client.post(
+        "/api/habits",
+        json={"name": "Walk", "type": "above", "target": 1, "frequency": "daily"},
+        headers=test_auth_headers,
+    )
+    client.delete(f"/api/habits/{habit.id}", headers=test_auth_headers)
+
+    assert _version(test_user.id) == 5
+    response = client.get("/api/habits", headers={**test_auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_failed_write_does_not_bump_version(client, test_user, test_habits, test_auth_headers):
+    client.post(
+        "/api/progress",
+        json={"habit_id": test_habits[2].id, "value": 1},  # Another user's habit
+        headers=test_auth_headers,
+    )
+
+    assert _version(test_user.id) == 0
+
+
+def test_etag_depends_on_query_string(client, test_habits, test_auth_headers):
+    plain = client.get("/api/habits", headers=test_auth_headers).headers["ETag"]
+    projected = client.get("/api/habits?fields=name", headers=test_auth_headers).headers["ETag"]
+
+    assert plain != projected
+
+
+def test_error_responses_are_not_tagged(client, test_habits, test_auth_headers):
+    response = client.get("/api/stats/trends", headers=test_auth_headers)
+
+    assert response.status_code == 400
+    assert "ETag" not in response.headers
+
+
+def test_writes_publish_committed_version(client, test_user, test_habits, test_auth_headers, monkeypatch):
+    """Writers cache the new version instead of leaving the key for readers to refill."""
+    published = []
+    monkeypatch.setattr(
+        "app.data_version.set_cached_data_version",
+        lambda user_id, version: published.append((user_id, version)),
+    )
+
+    client.post("/api/progress", json={"habit_id": test_habits[0].id, "value": 1}, headers=test_auth_headers)
+
+    assert published == [(test_user.id, _version(test_user.id))]
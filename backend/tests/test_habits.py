@@ -1,4 +1,4 @@
-from app.models import ProgressEntry
+from app.models import db, ProgressEntry
 
 import datetime
 import pytest
@@ -241,6 +241,7 @@ def test_habit_completion_above_type(
 
     assert habit is not None
     assert habit["is_completed"] is expected_completed
+    assert habit["current_total"] == progress_value
 
 
 @pytest.mark.parametrize(
@@ -370,6 +371,127 @@ def test_habit_completion_target_zero(client, test_user, test_auth_headers):
     assert habit["is_completed"] is False
 
 
+def test_fetch_habits_current_total_skips_entries(client, test_habits, test_auth_headers):
+    """The listing reads the current period's pre-summed total, never the entry history."""
+    from sqlalchemy import event
+
+    habit = test_habits[1]  # Weekly
+    today = datetime.date.today()
+    for day in (today, today - datetime.timedelta(days=7 * 3)):
+        client.post(
+            "/api/progress",
+            headers=test_auth_headers,
+            json={"habit_id": habit.id, "value": 10, "date": day.isoformat()},
+        )
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        response = client.get("/api/habits", headers=test_auth_headers)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+    totals = {h["id"]: h["current_total"] for h in response.get_json()["data"]}
+    assert totals == {test_habits[0].id: 0, habit.id: 10}
+    assert not [s for s in statements if "progress_entry" in s]
+
+
+def test_fetch_habits_keyset_pagination(client, test_user, test_auth_headers):
+    for i in range(5):
+        client.post(
+            "/api/habits",
+            headers=test_auth_headers,
+            json={"name": f"Habit {i}", "type": "above", "target": 1, "frequency": "daily"},
+        )
+
+    names = []
+    cursor = None
+    for _ in range(3):
+        query = "/api/habits?limit=2" + (f"&after={cursor}" if cursor else "")
+        data = client.get(query, headers=test_auth_headers).get_json()
+        names.extend(h["name"] for h in data["data"])
+        cursor = data["next_cursor"]
+
+    assert names == [f"Habit {i}" for i in range(5)]
+    assert cursor is None
+
+
+def test_fetch_habits_sparse_fieldset(client, test_habits, test_auth_headers):
+    from sqlalchemy import event
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        response = client.get("/api/habits?fields=name", headers=test_auth_headers)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+    assert response.get_json()["data"] == [
+        {"id": test_habits[0].id, "name": "Drink Water"},
+        {"id": test_habits[1].id, "name": "Exercise"},
+    ]
+    habit_query = next(s for s in statements if "FROM habit" in s)
+    assert "habit.unit" not in habit_query
+    # Completion is not requested, so no totals are read
+    assert not [s for s in statements if "habit_period_total" in s]
+
+
+def test_fetch_habits_fields_skip_empty_names(client, test_habits, test_auth_headers):
+    response = client.get("/api/habits?fields=name,,is_completed,", headers=test_auth_headers)
+
+    assert response.status_code == 200
+    assert set(response.get_json()["data"][0]) == {"id", "name", "is_completed"}
+
+
+@pytest.mark.parametrize("query", ["fields=name,colour", "limit=0", "limit=abc", "after=x"])
+def test_fetch_habits_invalid_listing_parameters(client, test_habits, test_auth_headers, query):
+    response = client.get(f"/api/habits?{query}", headers=test_auth_headers)
+
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+
+def test_fetch_habits_dashboard_snapshot(client, test_habits, test_auth_headers, monkeypatch):
+    from sqlalchemy import event
+
+    snapshots = {}
+    monkeypatch.setattr(
+        "app.routes.habits.set_cached_dashboard",
+        lambda user_id, version, snapshot, ttl: snapshots.update({user_id: (snapshot, ttl)}),
+    )
+    monkeypatch.setattr(
+        "app.routes.habits.get_cached_dashboard",
+        lambda user_id, version: snapshots[user_id][0] if user_id in snapshots else None,
+    )
+
+    first = client.get("/api/habits", headers=test_auth_headers)
+    [(snapshot, ttl)] = snapshots.values()
+    assert 0 < ttl <= 86400  # Daily habits roll over at midnight
+
+    # Warm loads are served from the snapshot without any query
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        second = client.get("/api/habits", headers=test_auth_headers)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+    assert second.get_json() == first.get_json()
+    assert [s for s in statements if "FROM habit" in s] == []
+
+    # Other listings bypass the snapshot
+    client.get("/api/habits?fields=name", headers=test_auth_headers)
+    assert len(snapshots) == 1
+
+    # Writes drop it
+    monkeypatch.setattr("app.data_version.invalidate_cached_dashboard", lambda user_id: snapshots.pop(user_id))
+    client.post("/api/progress", json={"habit_id": test_habits[0].id, "value": 1}, headers=test_auth_headers)
+    assert snapshots == {}
+
+
 def test_update_habit_prevents_attribute_injection(
     client, app, test_user, test_auth_headers
 ):
@@ -501,3 +623,28 @@ def test_update_habit_input_validation(client, test_user, test_auth_headers, fie
     resp_data = response.get_json()
     assert resp_data["success"] is False
     assert expected_error in resp_data["message"].lower()
+
+
+def test_fetch_habits_ignores_snapshot_of_older_version(client, test_habits, test_auth_headers, monkeypatch):
+    """A snapshot built before a concurrent write is not served once the version moved on."""
+    from app.data_version import bump_data_version
+
+    stored = {}
+    monkeypatch.setattr(
+        "app.routes.habits.set_cached_dashboard",
+        lambda user_id, version, snapshot, ttl: stored.update(version=version, snapshot=snapshot),
+    )
+    monkeypatch.setattr(
+        "app.routes.habits.get_cached_dashboard",
+        lambda user_id, version: stored["snapshot"] if stored.get("version") == version else None,
+    )
+    client.get("/api/habits", headers=test_auth_headers)
+    old_version = stored["version"]
+
+    test_habits[0].name = "Renamed"
+    bump_data_version(test_habits[0].user_id)
+    db.session.commit()
+    response = client.get("/api/habits", headers=test_auth_headers)
+
+    assert "Renamed" in [habit["name"] for habit in response.get_json()["data"]]
+    assert stored["version"] == old_version + 1
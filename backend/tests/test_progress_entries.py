@@ -280,3 +280,415 @@ def test_get_progress_entries_invalid_end_date_format(client, test_auth_headers)
     data = response.get_json()
     assert data["success"] is False
     assert "invalid end_date format" in data["message"].lower()
+
+
+def test_progress_changes_update_best_streak(client, test_habits, test_auth_headers):
+    """Adding or deleting an entry that flips a period's outcome updates the stored best streak."""
+    from app.models import Habit
+
+    habit = test_habits[0]  # Daily, ABOVE, target 1
+    habit.start_date = date.today() - timedelta(days=5)
+    db.session.commit()
+
+    entry_ids = []
+    for days_ago in (3, 2, 1):
+        day = (date.today() - timedelta(days=days_ago)).isoformat()
+        response = client.post(
+            "/api/progress",
+            json={"habit_id": habit.id, "date": day, "value": 1},
+            headers=test_auth_headers,
+        )
+        entry_ids.append(response.get_json()["data"]["id"])
+    assert db.session.get(Habit, habit.id).best_streak == 3
+
+    # A second entry in an already successful period leaves the value alone
+    client.post(
+        "/api/progress",
+        json={"habit_id": habit.id, "date": (date.today() - timedelta(days=1)).isoformat(), "value": 1},
+        headers=test_auth_headers,
+    )
+    assert db.session.get(Habit, habit.id).best_streak == 3
+
+    client.delete(f"/api/progress/{entry_ids[1]}", headers=test_auth_headers)
+    assert db.session.get(Habit, habit.id).best_streak == 1
+
+
+def test_progress_changes_update_cached_streak(client, test_habits, test_auth_headers, monkeypatch):
+    """Writes to the present period adjust the cached streak instead of dropping it."""
+    from app.streaks import build_streak_state
+
+    cache = {}
+    monkeypatch.setattr(
+        "app.aggregates.get_cached_streaks", lambda ids: {i: cache[i] for i in ids if i in cache}
+    )
+    monkeypatch.setattr("app.aggregates.set_cached_streaks", cache.update)
+    monkeypatch.setattr(
+        "app.aggregates.invalidate_streak_caches", lambda habit_ids: [cache.pop(i, None) for i in habit_ids]
+    )
+
+    habit = test_habits[0]  # Daily, ABOVE, target 1, starting today
+    cache[habit.id] = build_streak_state(habit, 0, 0).to_dict()
+
+    response = client.post(
+        "/api/progress", json={"habit_id": habit.id, "value": 1}, headers=test_auth_headers
+    )
+    assert cache[habit.id]["streak"] == 1
+    assert cache[habit.id]["current_total"] == 1
+
+    client.delete(f"/api/progress/{response.get_json()['data']['id']}", headers=test_auth_headers)
+    assert cache[habit.id]["streak"] == 0
+
+    # A back-dated entry inside the habit's history needs a full recalculation
+    habit.start_date = date.today() - timedelta(days=5)
+    db.session.commit()
+    cache[habit.id] = build_streak_state(habit, 0, 0).to_dict()
+    client.post(
+        "/api/progress",
+        json={"habit_id": habit.id, "value": 1, "date": (date.today() - timedelta(days=1)).isoformat()},
+        headers=test_auth_headers,
+    )
+    assert habit.id not in cache
+
+
+def test_get_progress_all_is_streamed_in_chunks(client, progress_entries, test_auth_headers, monkeypatch):
+    monkeypatch.setattr("app.routes.progress.EXPORT_CHUNK_SIZE", 2)
+
+    response = client.get("/api/progress?all=true", headers=test_auth_headers, buffered=False)
+
+    assert response.is_streamed
+    assert response.mimetype == "application/json"
+    data = response.get_json()
+    assert data["success"] is True
+    assert [entry["date"] for entry in data["data"]] == ["2024-05-01", "2024-05-02", "2024-05-03"]
+    assert [entry["value"] for entry in data["data"]] == [1, 2, 3]
+
+
+def test_get_progress_all_streams_empty_history(client, test_habits, test_auth_headers):
+    response = client.get("/api/progress?all=true", headers=test_auth_headers)
+
+    assert response.get_json() == {"success": True, "data": []}
+
+
+def test_get_progress_current_period_in_one_query(client, test_habits, test_auth_headers):
+    from sqlalchemy import event
+
+    daily, weekly = test_habits[0], test_habits[1]
+    today = date.today()
+    for habit, day in [(daily, today), (daily, today - timedelta(days=1)), (weekly, today), (weekly, today - timedelta(days=7))]:
+        client.post(
+            "/api/progress",
+            json={"habit_id": habit.id, "date": day.isoformat(), "value": 1},
+            headers=test_auth_headers,
+        )
+
+    for habit_param, expected in [("", {daily.id, weekly.id}), (f"?habit_id={weekly.id}", {weekly.id})]:
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            response = client.get(f"/api/progress{habit_param}", headers=test_auth_headers)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+
+        data = response.get_json()["data"]
+        assert {entry["habit_id"] for entry in data} == expected
+        assert all(entry["date"] == today.isoformat() for entry in data)
+        assert len([s for s in statements if "progress_entry" in s]) == 1
+        assert not [s for s in statements if "progress_entry" not in s and "FROM habit" in s]
+
+
+def test_get_progress_owned_habit_without_current_entries(client, test_habits, test_auth_headers):
+    response = client.get(f"/api/progress?habit_id={test_habits[0].id}", headers=test_auth_headers)
+
+    assert response.status_code == 200
+    assert response.get_json()["data"] == []
+
+
+def test_get_progress_keyset_pagination(client, test_habits, test_auth_headers):
+    habit = test_habits[0]
+    days = [date(2024, 5, 1) + timedelta(days=offset) for offset in range(7)]
+    for day in days:
+        client.post(
+            "/api/progress",
+            json={"habit_id": habit.id, "date": day.isoformat(), "value": 1},
+            headers=test_auth_headers,
+        )
+
+    pages = []
+    cursor = None
+    while True:
+        url = f"/api/progress?habit_id={habit.id}&limit=3" + (f"&cursor={cursor}" if cursor else "")
+        data = client.get(url, headers=test_auth_headers).get_json()
+        pages.append([entry["date"] for entry in data["data"]])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    newest_first = [day.isoformat() for day in reversed(days)]
+    assert pages == [newest_first[0:3], newest_first[3:6], newest_first[6:]]
+
+
+def test_get_progress_pagination_seeks_past_cursor(client, test_habits, test_auth_headers):
+    from sqlalchemy import event
+
+    first = client.get("/api/progress?limit=1", headers=test_auth_headers).get_json()
+    assert first == {"success": True, "data": [], "next_cursor": None}
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        client.get("/api/progress?limit=1&cursor=MjAyNC0wNS0wMzo0Mg==", headers=test_auth_headers)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+    # The page starts at the cursor's (date, id) position rather than skipping rows
+    [page_query] = [s for s in statements if "progress_entry" in s]
+    assert "(progress_entry.date, progress_entry.id) <" in page_query
+
+
+@pytest.mark.parametrize("query", ["limit=0", "limit=501", "limit=x", "limit=5&cursor=garbage"])
+def test_get_progress_invalid_pagination(client, test_habits, test_auth_headers, query):
+    response = client.get(f"/api/progress?{query}", headers=test_auth_headers)
+
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+
+def test_get_progress_cursor_without_limit(client, test_habits, test_auth_headers):
+    habit = test_habits[0]
+    for day in ("2024-05-01", "2024-05-02"):
+        client.post("/api/progress", json={"habit_id": habit.id, "date": day, "value": 1}, headers=test_auth_headers)
+    cursor = client.get(
+        f"/api/progress?habit_id={habit.id}&limit=1", headers=test_auth_headers
+    ).get_json()["next_cursor"]
+
+    response = client.get(f"/api/progress?habit_id={habit.id}&cursor={cursor}", headers=test_auth_headers)
+
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "cursor requires limit"
+
+
+def test_get_progress_pagination_other_users_habit(client, test_habits, test_auth_headers):
+    response = client.get(f"/api/progress?habit_id={test_habits[2].id}&limit=5", headers=test_auth_headers)
+
+    assert response.status_code == 404
+
+
+def test_add_progress_batch(client, test_habits, test_auth_headers):
+    daily, weekly, foreign = test_habits
+    entries = [
+        {"habit_id": daily.id, "date": "2024-05-06", "value": 1},
+        {"habit_id": weekly.id, "date": "2024-05-06", "value": 10},
+        {"habit_id": weekly.id, "date": "2024-05-08", "value": 5},
+        {"habit_id": foreign.id, "date": "2024-05-06", "value": 1},
+        {"habit_id": daily.id, "date": "2024-05-07", "value": -1},
+        {"habit_id": daily.id, "date": "not-a-date", "value": 1},
+        {"value": 1},
+    ]
+
+    response = client.post("/api/progress/batch", json={"entries": entries}, headers=test_auth_headers)
+
+    assert response.status_code == 201
+    data = response.get_json()["data"]
+    assert data["created"] == 3
+    assert data["failed"] == 4
+    assert [result["success"] for result in data["results"]] == [True, True, True, False, False, False, False]
+    assert data["results"][3]["message"] == "Habit not found or unauthorized"
+    assert ProgressEntry.query.count() == 3
+
+    # Period totals reflect every entry of the batch
+    from app.models import HabitPeriodTotal
+    weekly_total = HabitPeriodTotal.query.filter_by(habit_id=weekly.id).one()
+    assert (weekly_total.total, weekly_total.entry_count) == (15, 2)
+
+
+def test_add_progress_batch_updates_caches_once(client, test_habits, test_auth_headers, monkeypatch):
+    calls = []
+    monkeypatch.setattr("app.routes.progress.publish_data_version", lambda user_id: calls.append(("user", user_id)))
+    monkeypatch.setattr(
+        "app.routes.progress.update_cached_streaks",
+        lambda habits, changes: calls.append(("streaks", sorted(changes))),
+    )
+    daily, weekly = test_habits[0], test_habits[1]
+    entries = [{"habit_id": habit.id, "value": 1} for habit in (daily, weekly, daily, weekly)]
+
+    client.post("/api/progress/batch", json={"entries": entries}, headers=test_auth_headers)
+
+    assert calls == [("user", daily.user_id), ("streaks", sorted([daily.id, weekly.id]))]
+
+
+def test_add_progress_batch_rejects_wrongly_typed_items(client, test_habits, test_auth_headers):
+    daily = test_habits[0]
+    entries = [
+        {"habit_id": daily.id, "date": 20240101, "value": 1},
+        {"habit_id": True, "value": 1},
+        {"habit_id": daily.id, "value": 1},
+    ]
+
+    response = client.post("/api/progress/batch", json={"entries": entries}, headers=test_auth_headers)
+
+    assert response.status_code == 201
+    results = response.get_json()["data"]["results"]
+    assert [result["success"] for result in results] == [False, False, True]
+    assert results[0]["message"] == "Invalid date format. Use YYYY-MM-DD."
+    assert results[1]["message"] == "Habit not found or unauthorized"
+
+
+def test_add_progress_batch_reports_every_entry_when_insert_fails(
+    client, test_habits, test_auth_headers, monkeypatch
+):
+    """A habit deleted before the insert fails the batch, and every entry is reported as not stored."""
+    from app.models import Habit, HabitPeriodTotal
+    from app.routes import progress
+
+    daily, weekly = test_habits[0], test_habits[1]
+    original = progress.record_progress_batch_added
+
+    def delete_concurrently(habit, entries):
+        changes = original(habit, entries)
+        db.session.execute(Habit.__table__.delete().where(Habit.id == weekly.id))
+        return changes
+
+    monkeypatch.setattr(progress, "record_progress_batch_added", delete_concurrently)
+    entries = [{"habit_id": daily.id, "value": 1}, {"habit_id": weekly.id, "value": 1}, {"value": 1}]
+    response = client.post("/api/progress/batch", json={"entries": entries}, headers=test_auth_headers)
+
+    assert response.status_code == 409
+    results = response.get_json()["results"]
+    assert [result["success"] for result in results] == [False, False, False]
+    assert results[0]["message"] == "Could not store the entry"
+    assert results[2]["message"] == "Missing required fields"
+    assert ProgressEntry.query.count() == 0
+    assert HabitPeriodTotal.query.count() == 0
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [{}, {"entries": []}, {"entries": "x"}, {"entries": [{"habit_id": [1], "value": 1}]}],
+)
+def test_add_progress_batch_rejects_invalid_payload(client, test_habits, test_auth_headers, payload):
+    response = client.post("/api/progress/batch", json=payload, headers=test_auth_headers)
+
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+    assert ProgressEntry.query.count() == 0
+
+
+def _add_entries(client, headers, habit, days):
+    response = client.post(
+        "/api/progress/batch",
+        json={"entries": [{"habit_id": habit.id, "date": day, "value": 1} for day in days]},
+        headers=headers,
+    )
+    assert response.status_code == 201
+
+
+def test_delete_progress_by_ids(client, test_habits, test_auth_headers):
+    daily, weekly = test_habits[0], test_habits[1]
+    _add_entries(client, test_auth_headers, daily, ["2024-05-06", "2024-05-07"])
+    _add_entries(client, test_auth_headers, weekly, ["2024-05-06", "2024-05-08"])
+    foreign = ProgressEntry(habit_id=test_habits[2].id, date=date(2024, 5, 6), value=1)
+    db.session.add(foreign)
+    db.session.commit()
+    ids = {(e.habit_id, e.date.isoformat()): e.id for e in ProgressEntry.query}
+
+    to_delete = [ids[(daily.id, "2024-05-06")], ids[(weekly.id, "2024-05-08")], foreign.id, 999999]
+    response = client.delete("/api/progress", json={"ids": to_delete}, headers=test_auth_headers)
+
+    data = response.get_json()["data"]
+    assert response.status_code == 200
+    assert data == {"deleted": 2, "not_found": [foreign.id, 999999]}
+    assert db.session.get(ProgressEntry, foreign.id) is not None
+
+    from app.models import HabitPeriodTotal
+    totals = {(t.habit_id, t.period_start): (t.total, t.entry_count) for t in HabitPeriodTotal.query}
+    assert totals == {(daily.id, date(2024, 5, 7)): (1, 1), (weekly.id, date(2024, 5, 6)): (1, 1)}
+
+
+def test_delete_progress_by_range_in_one_statement(client, test_habits, test_auth_headers):
+    from sqlalchemy import event
+
+    habit = test_habits[0]
+    _add_entries(client, test_auth_headers, habit, ["2024-05-01", "2024-05-02", "2024-05-03", "2024-05-04"])
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        response = client.delete(
+            "/api/progress",
+            json={"habit_id": habit.id, "start_date": "2024-05-02", "end_date": "2024-05-03"},
+            headers=test_auth_headers,
+        )
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+    assert response.get_json()["data"] == {"deleted": 2}
+    assert sorted(e.date.isoformat() for e in ProgressEntry.query) == ["2024-05-01", "2024-05-04"]
+    assert len([s for s in statements if s.startswith("DELETE FROM progress_entry")]) == 1
+
+
+def test_delete_progress_range_of_other_users_habit(client, test_habits, test_auth_headers):
+    db.session.add(ProgressEntry(habit_id=test_habits[2].id, date=date(2024, 5, 6), value=1))
+    db.session.commit()
+
+    response = client.delete(
+        "/api/progress", json={"habit_id": test_habits[2].id, "all": True}, headers=test_auth_headers
+    )
+
+    assert response.get_json()["data"] == {"deleted": 0}
+    assert ProgressEntry.query.count() == 1
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {},
+        {"ids": []},
+        {"ids": ["1"]},
+        {"ids": [True]},
+        {"habit_id": "1"},
+        {"habit_id": 1, "start_date": "05/02/2024"},
+        # A range without bounds needs an explicit all: true
+        {"habit_id": 1},
+        {"habit_id": 1, "all": "yes"},
+    ],
+)
+def test_delete_progress_rejects_invalid_payload(client, test_habits, test_auth_headers, payload):
+    response = client.delete("/api/progress", json=payload, headers=test_auth_headers)
+
+    assert response.status_code == 400
+
+
+def test_delete_progress_all_entries_of_habit(client, test_habits, test_auth_headers):
+    habit = test_habits[0]
+    _add_entries(client, test_auth_headers, habit, ["2024-05-01", "2024-05-02"])
+
+    response = client.delete("/api/progress", json={"habit_id": habit.id, "all": True}, headers=test_auth_headers)
+
+    assert response.get_json()["data"] == {"deleted": 2}
+    assert ProgressEntry.query.count() == 0
+
+
+def test_delete_progress_rolls_back_when_rows_vanish(client, test_habits, test_auth_headers, monkeypatch):
+    """Aggregates are not decremented for entries another request already deleted."""
+    from app.models import HabitPeriodTotal
+    from app.routes import progress
+
+    habit = test_habits[0]
+    _add_entries(client, test_auth_headers, habit, ["2024-05-01", "2024-05-02"])
+    ids = [e.id for e in ProgressEntry.query]
+    original = progress.record_progress_batch_removed
+
+    def delete_concurrently(habit, entries):
+        # Another request deletes one of the entries between the read and the delete
+        db.session.execute(ProgressEntry.__table__.delete().where(ProgressEntry.id == ids[0]))
+        return original(habit, entries)
+
+    monkeypatch.setattr(progress, "record_progress_batch_removed", delete_concurrently)
+    response = client.delete("/api/progress", json={"ids": ids}, headers=test_auth_headers)
+
+    assert response.status_code == 409
+    assert ProgressEntry.query.count() == 2
+    assert HabitPeriodTotal.query.count() == 2
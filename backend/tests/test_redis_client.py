@@ -1,5 +1,6 @@
 """Tests for Redis client caching functionality."""
 
+import json
 import pytest
 from unittest.mock import patch, MagicMock
 import redis
@@ -7,12 +8,30 @@ import redis
 from app import redis_client
 from app.redis_client import (
     get_redis_client,
-    get_cached_streak,
+    get_cached_streaks,
     set_cached_streak,
+    set_cached_streaks,
     invalidate_streak_cache,
+    invalidate_streak_caches,
+    get_cached_data_version,
+    set_cached_data_version,
+    invalidate_cached_dashboard,
+    get_cached_dashboard,
+    set_cached_dashboard,
+    store_refresh_token,
+    pop_refresh_token,
+    DATA_VERSION_TTL,
     STREAK_CACHE_TTL,
 )
 
+STATE = {
+    "streak": 5,
+    "anchor": "2025-08-10",
+    "current_total": 1.0,
+    "previous_success": True,
+    "break_period": "2025-08-05",
+}
+
 
 @pytest.fixture(autouse=True)
 def reset_redis_client():
@@ -74,132 +93,252 @@ class TestGetRedisClient:
         assert result is existing_client
 
 
-class TestGetCachedStreak:
-    """Tests for get_cached_streak function."""
+class TestSetCachedStreak:
+    """Tests for set_cached_streak function."""
 
-    def test_returns_none_when_client_unavailable(self, monkeypatch):
-        """Test that None is returned when Redis client is unavailable."""
+    def test_does_nothing_when_client_unavailable(self, monkeypatch):
+        """Test that function returns gracefully when Redis unavailable."""
         monkeypatch.delenv("REDIS_URL", raising=False)
 
-        result = get_cached_streak(123)
+        # Should not raise
+        set_cached_streak(123, STATE)
 
-        assert result is None
+    def test_caches_streak_with_ttl(self, monkeypatch):
+        """Test that streak is cached with correct TTL."""
+        monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
+
+        with patch("app.redis_client.redis.from_url") as mock_from_url:
+            mock_client = MagicMock()
+            mock_client.ping.return_value = True
+            mock_from_url.return_value = mock_client
+
+            set_cached_streak(123, STATE)
 
-    def test_returns_none_when_key_not_found(self, monkeypatch):
-        """Test that None is returned when streak is not cached."""
+            mock_client.setex.assert_called_once_with(
+                "streak:123", STREAK_CACHE_TTL, json.dumps(STATE)
+            )
+
+    def test_handles_redis_error_gracefully(self, monkeypatch):
+        """Test graceful handling of Redis errors during set."""
         monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
 
         with patch("app.redis_client.redis.from_url") as mock_from_url:
             mock_client = MagicMock()
             mock_client.ping.return_value = True
-            mock_client.get.return_value = None
+            mock_client.setex.side_effect = redis.RedisError("Connection lost")
             mock_from_url.return_value = mock_client
 
-            result = get_cached_streak(123)
+            # Should not raise
+            set_cached_streak(123, STATE)
+
 
-            assert result is None
-            mock_client.get.assert_called_once_with("streak:123")
+class TestInvalidateStreakCache:
+    """Tests for invalidate_streak_cache function."""
+
+    def test_does_nothing_when_client_unavailable(self, monkeypatch):
+        """Test that function returns gracefully when Redis unavailable."""
+        monkeypatch.delenv("REDIS_URL", raising=False)
+
+        # Should not raise
+        invalidate_streak_cache(123)
 
-    def test_returns_cached_value(self, monkeypatch):
-        """Test that cached streak value is returned."""
+    def test_deletes_cached_streak(self, monkeypatch):
+        """Test that cached streak is deleted."""
         monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
 
         with patch("app.redis_client.redis.from_url") as mock_from_url:
             mock_client = MagicMock()
             mock_client.ping.return_value = True
-            mock_client.get.return_value = "42"
             mock_from_url.return_value = mock_client
 
-            result = get_cached_streak(123)
+            invalidate_streak_cache(123)
 
-            assert result == 42
+            mock_client.delete.assert_called_once_with("streak:123")
 
-    def test_returns_none_on_redis_error(self, monkeypatch):
-        """Test graceful handling of Redis errors during get."""
+    def test_deletes_several_streaks_in_one_call(self, monkeypatch):
+        """Test that several cached streaks are deleted with one command."""
         monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
 
         with patch("app.redis_client.redis.from_url") as mock_from_url:
             mock_client = MagicMock()
             mock_client.ping.return_value = True
-            mock_client.get.side_effect = redis.RedisError("Connection lost")
             mock_from_url.return_value = mock_client
 
-            result = get_cached_streak(123)
+            invalidate_streak_caches([1, 2])
+            invalidate_streak_caches([])
 
-            assert result is None
+            mock_client.delete.assert_called_once_with("streak:1", "streak:2")
 
+    def test_handles_redis_error_gracefully(self, monkeypatch):
+        """Test graceful handling of Redis errors during delete."""
+        monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
 
-class TestSetCachedStreak:
-    """Tests for set_cached_streak function."""
+        with patch("app.redis_client.redis.from_url") as mock_from_url:
+            mock_client = MagicMock()
+            mock_client.ping.return_value = True
+            mock_client.delete.side_effect = redis.RedisError("Connection lost")
+            mock_from_url.return_value = mock_client
 
-    def test_does_nothing_when_client_unavailable(self, monkeypatch):
-        """Test that function returns gracefully when Redis unavailable."""
+            # Should not raise
+            invalidate_streak_cache(123)
+
+
+class TestBatchedStreakCache:
+    """Tests for get_cached_streaks and set_cached_streaks."""
+
+    def test_returns_empty_when_client_unavailable(self, monkeypatch):
         monkeypatch.delenv("REDIS_URL", raising=False)
 
+        assert get_cached_streaks([1, 2]) == {}
         # Should not raise
-        set_cached_streak(123, 5)
+        set_cached_streaks({1: STATE})
 
-    def test_caches_streak_with_ttl(self, monkeypatch):
-        """Test that streak is cached with correct TTL."""
+    def test_gets_all_states_in_one_call(self, monkeypatch):
+        """Test that one MGET serves every habit and misses and unreadable values are left out."""
         monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
 
         with patch("app.redis_client.redis.from_url") as mock_from_url:
             mock_client = MagicMock()
             mock_client.ping.return_value = True
+            mock_client.mget.return_value = [json.dumps(STATE), None, "7", "{not json"]
             mock_from_url.return_value = mock_client
 
-            set_cached_streak(123, 5)
+            result = get_cached_streaks([1, 2, 3, 4])
 
-            mock_client.setex.assert_called_once_with(
-                "streak:123", STREAK_CACHE_TTL, 5
-            )
+            assert result == {1: STATE}
+            mock_client.mget.assert_called_once_with(["streak:1", "streak:2", "streak:3", "streak:4"])
+
+    def test_sets_states_through_pipeline(self, monkeypatch):
+        monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
+
+        with patch("app.redis_client.redis.from_url") as mock_from_url:
+            mock_client = MagicMock()
+            mock_client.ping.return_value = True
+            mock_from_url.return_value = mock_client
+            pipeline = mock_client.pipeline.return_value
+
+            set_cached_streaks({1: STATE, 2: STATE})
+
+            assert pipeline.setex.call_count == 2
+            pipeline.setex.assert_any_call("streak:2", STREAK_CACHE_TTL, json.dumps(STATE))
+            pipeline.execute.assert_called_once()
 
     def test_handles_redis_error_gracefully(self, monkeypatch):
-        """Test graceful handling of Redis errors during set."""
         monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
 
         with patch("app.redis_client.redis.from_url") as mock_from_url:
             mock_client = MagicMock()
             mock_client.ping.return_value = True
-            mock_client.setex.side_effect = redis.RedisError("Connection lost")
+            mock_client.mget.side_effect = redis.RedisError("Connection lost")
             mock_from_url.return_value = mock_client
 
-            # Should not raise
-            set_cached_streak(123, 5)
+            assert get_cached_streaks([1]) == {}
 
 
-class TestInvalidateStreakCache:
-    """Tests for invalidate_streak_cache function."""
+class TestDataVersionCache:
+    """Tests for the per-user data version functions."""
 
-    def test_does_nothing_when_client_unavailable(self, monkeypatch):
-        """Test that function returns gracefully when Redis unavailable."""
+    def test_returns_none_when_client_unavailable(self, monkeypatch):
         monkeypatch.delenv("REDIS_URL", raising=False)
 
-        # Should not raise
-        invalidate_streak_cache(123)
+        assert get_cached_data_version(1) is None
+        set_cached_data_version(1, 3)
+        invalidate_cached_dashboard(1)
 
-    def test_deletes_cached_streak(self, monkeypatch):
-        """Test that cached streak is deleted."""
+    def test_round_trips_version(self, monkeypatch):
         monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
 
         with patch("app.redis_client.redis.from_url") as mock_from_url:
             mock_client = MagicMock()
-            mock_client.ping.return_value = True
+            mock_client.get.return_value = "7"
             mock_from_url.return_value = mock_client
 
-            invalidate_streak_cache(123)
+            set_cached_data_version(1, 7)
+            assert get_cached_data_version(1) == 7
+            invalidate_cached_dashboard(1)
+
+            mock_client.eval.assert_called_once()
+            assert mock_client.eval.call_args[0][1:] == (1, "data_version:1", 7, DATA_VERSION_TTL)
+            mock_client.delete.assert_called_once_with("dashboard:1")
+
+    def test_returns_none_for_unreadable_value(self, monkeypatch):
+        monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
+
+        with patch("app.redis_client.redis.from_url") as mock_from_url:
+            mock_client = MagicMock()
+            mock_client.get.return_value = "not-a-number"
+            mock_from_url.return_value = mock_client
+
+            assert get_cached_data_version(1) is None
 
-            mock_client.delete.assert_called_once_with("streak:123")
+
+class TestDashboardCache:
+    """Tests for the dashboard snapshot functions."""
+
+    def test_returns_none_when_client_unavailable(self, monkeypatch):
+        monkeypatch.delenv("REDIS_URL", raising=False)
+
+        assert get_cached_dashboard(1, 0) is None
+        set_cached_dashboard(1, 0, "{}", 60)
+
+    def test_caches_snapshot_with_ttl(self, monkeypatch):
+        monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
+
+        with patch("app.redis_client.redis.from_url") as mock_from_url:
+            mock_client = MagicMock()
+            mock_client.get.return_value = '3:{"success": true}'
+            mock_from_url.return_value = mock_client
+
+            set_cached_dashboard(1, 3, '{"success": true}', 60)
+
+            mock_client.setex.assert_called_once_with("dashboard:1", 60, '3:{"success": true}')
+            assert get_cached_dashboard(1, 3) == '{"success": true}'
+            # Snapshots of another data version are not served
+            assert get_cached_dashboard(1, 4) is None
 
     def test_handles_redis_error_gracefully(self, monkeypatch):
-        """Test graceful handling of Redis errors during delete."""
         monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
 
         with patch("app.redis_client.redis.from_url") as mock_from_url:
             mock_client = MagicMock()
-            mock_client.ping.return_value = True
-            mock_client.delete.side_effect = redis.RedisError("Connection lost")
+            mock_client.get.side_effect = redis.RedisError("Connection lost")
+            mock_client.setex.side_effect = redis.RedisError("Connection lost")
             mock_from_url.return_value = mock_client
 
-            # Should not raise
-            invalidate_streak_cache(123)
+            assert get_cached_dashboard(1, 0) is None
+            set_cached_dashboard(1, 0, "{}", 60)
+
+
+class TestRefreshTokenStore:
+    """Tests for the refresh token functions."""
+
+    def test_reports_unavailable_client(self, monkeypatch):
+        monkeypatch.delenv("REDIS_URL", raising=False)
+
+        assert store_refresh_token("abc", 1, 60) is False
+        assert pop_refresh_token("abc") is None
+
+    def test_stores_and_pops_token(self, monkeypatch):
+        monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
+
+        with patch("app.redis_client.redis.from_url") as mock_from_url:
+            mock_client = MagicMock()
+            mock_client.getdel.return_value = "7"
+            mock_from_url.return_value = mock_client
+
+            assert store_refresh_token("abc", 7, 60) is True
+            mock_client.setex.assert_called_once_with("refresh_token:abc", 60, 7)
+            assert pop_refresh_token("abc") == 7
+            mock_client.getdel.assert_called_once_with("refresh_token:abc")
+
+    def test_handles_redis_error_gracefully(self, monkeypatch):
+        monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
+
+        with patch("app.redis_client.redis.from_url") as mock_from_url:
+            mock_client = MagicMock()
+            mock_client.setex.side_effect = redis.RedisError("Connection lost")
+            mock_client.getdel.side_effect = redis.RedisError("Connection lost")
+            mock_from_url.return_value = mock_client
+
+            assert store_refresh_token("abc", 7, 60) is False
+            assert pop_refresh_token("abc") is None
@@ -1,9 +1,12 @@
 """Tests for security event logging."""
 
 import json
+import os
+import time
 import pytest
 from unittest.mock import patch
 from app import create_app
+from app import security_logger
 from app.security_logger import (
     log_login_success,
     log_login_failure,
@@ -12,6 +15,8 @@ from app.security_logger import (
     log_token_validation_failure,
     log_unauthorized_access,
     _get_client_ip,
+    flush_security_log,
+    SecurityLogWriter,
 )
 
 
@@ -65,6 +70,7 @@ class TestSecurityEventLogging:
 
             log_login_success("testuser", 123)
 
+            flush_security_log()
             captured = capsys.readouterr()
             log_entry = json.loads(captured.err.strip())
 
@@ -82,6 +88,7 @@ class TestSecurityEventLogging:
 
             log_login_failure("baduser", "invalid_credentials")
 
+            flush_security_log()
             captured = capsys.readouterr()
             log_entry = json.loads(captured.err.strip())
 
@@ -98,6 +105,7 @@ class TestSecurityEventLogging:
 
             log_signup_success("newuser", 456)
 
+            flush_security_log()
             captured = capsys.readouterr()
             log_entry = json.loads(captured.err.strip())
 
@@ -113,6 +121,7 @@ class TestSecurityEventLogging:
 
             log_signup_failure("existinguser", "username_exists")
 
+            flush_security_log()
             captured = capsys.readouterr()
             log_entry = json.loads(captured.err.strip())
 
@@ -130,6 +139,7 @@ class TestSecurityEventLogging:
 
             log_token_validation_failure("Token has expired")
 
+            flush_security_log()
             captured = capsys.readouterr()
             log_entry = json.loads(captured.err.strip())
 
@@ -146,6 +156,7 @@ class TestSecurityEventLogging:
 
             log_unauthorized_access("/api/stats", "GET", "missing_token")
 
+            flush_security_log()
             captured = capsys.readouterr()
             log_entry = json.loads(captured.err.strip())
 
@@ -167,6 +178,7 @@ class TestSecurityLoggingIntegration:
 
         assert response.status_code == 401
 
+        flush_security_log()
         captured = capsys.readouterr()
         # Find the login_failure log line
         log_lines = [l for l in captured.err.strip().split("\n") if l]
@@ -199,6 +211,7 @@ class TestSecurityLoggingIntegration:
 
         assert response.status_code == 200
 
+        flush_security_log()
         captured = capsys.readouterr()
         log_lines = [l for l in captured.err.strip().split("\n") if l]
         login_success_logs = [
@@ -215,6 +228,7 @@ class TestSecurityLoggingIntegration:
 
         assert response.status_code == 401
 
+        flush_security_log()
         captured = capsys.readouterr()
         log_lines = [l for l in captured.err.strip().split("\n") if l]
         unauthorized_logs = [
@@ -223,3 +237,154 @@ class TestSecurityLoggingIntegration:
         ]
 
         assert len(unauthorized_logs) >= 1
+
+
+class TestSecurityLogWriter:
+    """Tests for the background security log writer."""
+
+    def test_writes_batches_to_file(self, tmp_path):
+        """Test that queued entries end up in the log file after a flush."""
+        path = tmp_path / "security.log"
+        writer = SecurityLogWriter(queue_size=10, path=str(path))
+
+        for i in range(3):
+            writer.enqueue({"event": "login_failure", "n": i})
+        assert writer.flush() is True
+
+        lines = [json.loads(l) for l in path.read_text().splitlines()]
+        assert [entry["n"] for entry in lines] == [0, 1, 2]
+
+    def test_counts_and_reports_dropped_entries(self, tmp_path):
+        """Test that entries beyond the queue size are dropped and reported."""
+        path = tmp_path / "security.log"
+        writer = SecurityLogWriter(queue_size=2, path=str(path))
+
+        # Keep the writer from running so the queue fills up
+        with patch.object(writer, "_ensure_started"):
+            for i in range(5):
+                writer.enqueue({"event": "login_failure", "n": i})
+        assert writer.dropped == 3
+
+        writer._ensure_started()
+        assert writer.flush() is True
+
+        lines = [json.loads(l) for l in path.read_text().splitlines()]
+        assert [entry.get("n") for entry in lines[:2]] == [0, 1]
+        assert lines[2]["event"] == "security_log_dropped"
+        assert lines[2]["count"] == 3
+
+    def test_logging_does_not_write_on_request_thread(self, app):
+        """Test that logging only queues the entry."""
+        with app.test_request_context(), patch("app.security_logger._writer") as mock_writer:
+            log_login_failure("baduser")
+
+            mock_writer.enqueue.assert_called_once()
+            assert mock_writer.enqueue.call_args[0][0]["event"] == "login_failure"
+
+    def test_aggregates_repeated_failures_per_window(self, tmp_path):
+        """Test that repeated token failures collapse into one counted entry."""
+        path = tmp_path / "security.log"
+        writer = SecurityLogWriter(queue_size=100, path=str(path), aggregate_window=60)
+
+        for _ in range(5):
+            writer.enqueue({"event": "token_validation_failure", "reason": "Token has expired",
+                            "ip": "10.0.0.1", "path": "/api/habits", "method": "GET"})
+        writer.enqueue({"event": "token_validation_failure", "reason": "Token has expired",
+                        "ip": "10.0.0.2", "path": "/api/habits", "method": "GET"})
+        for _ in range(2):
+            writer.enqueue({"event": "login_failure", "username": "baduser", "ip": "10.0.0.1"})
+        assert writer.flush() is True
+
+        lines = [json.loads(l) for l in path.read_text().splitlines()]
+        assert [entry["event"] for entry in lines[:2]] == ["login_failure", "login_failure"]
+        counts = {entry["ip"]: entry["count"] for entry in lines[2:]}
+        assert counts == {"10.0.0.1": 5, "10.0.0.2": 1}
+        assert all(entry["window_seconds"] == 60 for entry in lines[2:])
+
+    def test_closes_window_after_its_duration(self, tmp_path):
+        """Test that a window is written once it ends, without a flush."""
+        path = tmp_path / "security.log"
+        writer = SecurityLogWriter(queue_size=100, path=str(path), aggregate_window=0.05)
+
+        for _ in range(3):
+            writer.enqueue({"event": "unauthorized_access", "reason": "missing_token",
+                            "ip": "10.0.0.1", "path": "/api/stats", "method": "GET"})
+
+        for _ in range(100):
+            if path.exists() and path.read_text():
+                break
+            time.sleep(0.01)
+
+        [summary] = [json.loads(l) for l in path.read_text().splitlines()]
+        assert summary["event"] == "unauthorized_access"
+        assert summary["count"] == 3
+
+    def test_counts_entries_lost_to_failed_writes(self, tmp_path, capfd):
+        """Test that a failed write adds its entries to the drop counter and is reported once."""
+        # A directory cannot be opened for appending
+        writer = SecurityLogWriter(queue_size=10, path=str(tmp_path))
+
+        for _ in range(3):
+            writer.enqueue({"event": "login_failure"})
+        assert writer.flush() is True
+        writer.enqueue({"event": "login_failure"})
+        assert writer.flush() is True
+
+        assert writer.dropped == 4
+        assert capfd.readouterr().err.count("Security log write failed") == 1
+
+    def test_writer_is_configured_from_app_config(self, tmp_path, monkeypatch):
+        """Test that the SECURITY_LOG_* settings come from the app config."""
+        monkeypatch.setattr(security_logger, "_writer", security_logger._writer)
+        path = tmp_path / "security.log"
+
+        class FileLogConfig:
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+            SECRET_KEY = "test-secret-key"
+            SECURITY_LOG_FILE = str(path)
+            SECURITY_LOG_QUEUE_SIZE = 50
+            SECURITY_LOG_AGGREGATE_WINDOW = 30
+
+        app = create_app(FileLogConfig)
+        assert security_logger._writer._queue.maxsize == 50
+        assert security_logger._writer.aggregate_window == 30
+        with app.test_request_context():
+            log_login_failure("baduser")
+        assert flush_security_log() is True
+
+        [entry] = [json.loads(l) for l in path.read_text().splitlines()]
+        assert entry["event"] == "login_failure"
+
+    def test_close_writes_queued_entries_and_stops(self, tmp_path):
+        """Test that closing a writer flushes it and closes its file."""
+        path = tmp_path / "security.log"
+        writer = SecurityLogWriter(queue_size=10, path=str(path))
+
+        writer.enqueue({"event": "login_failure"})
+        assert writer.close() is True
+
+        assert len(path.read_text().splitlines()) == 1
+        assert writer._file is None
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+    def test_forked_child_does_not_write_parent_entries(self, tmp_path):
+        """Test that a child process starts with an empty queue of its own."""
+        path = tmp_path / "security.log"
+        writer = SecurityLogWriter(queue_size=10, path=str(path))
+
+        # Queue an entry in the parent without letting the writer run yet
+        with patch.object(writer, "_ensure_started"):
+            writer.enqueue({"event": "login_failure", "process": "parent"})
+
+        pid = os.fork()
+        if pid == 0:
+            writer.enqueue({"event": "login_failure", "process": "child"})
+            os._exit(0 if writer.flush() else 1)
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+
+        writer._ensure_started()
+        assert writer.flush() is True
+        lines = [json.loads(l) for l in path.read_text().splitlines()]
+        assert sorted(entry["process"] for entry in lines) == ["child", "parent"]
@@ -2,9 +2,9 @@ import pytest
 from datetime import date, timedelta
 
 from app.enums import HabitFrequency, HabitType
-from app.models import ProgressEntry
-from app.routes.stats import calculate_streak
-from app.utils import get_date_range, filter_progress_to_current_period
+from app.aggregates import load_completion_rates, rebuild_period_totals
+from app.models import db, Habit, ProgressEntry
+from app.utils import calculate_streak, get_date_range, filter_progress_to_current_period
 from tests.mocks import MockHabit, MockProgressEntry
 
 
@@ -182,42 +182,40 @@ def test_binary_habit_done_then_undone():
 
 
 @pytest.mark.parametrize(
-    "mock_habits, mock_progress_entries",
+    "mock_habits",
     [
-        (
-            {
-                "habits": [
-                    {
-                        "id": 1,
-                        "name": "Drink water",
-                        "frequency": HabitFrequency.DAILY,
-                        "type": HabitType.ABOVE,
-                        "target_value": 8,
-                    },
-                    {
-                        "id": 2,
-                        "name": "Go for a run",
-                        "frequency": HabitFrequency.WEEKLY,
-                        "type": HabitType.ABOVE,
-                        "target_value": 1,
-                    },
-                ],
-                "path": "app.utils.Habit.query",
-            },
-            {
-                "entries": [
-                    ProgressEntry(habit_id=1, date=date(2025, 8, 9), value=8),
-                    ProgressEntry(habit_id=2, date=date(2025, 8, 8), value=1),
-                ],
-                "path": "app.routes.stats.ProgressEntry.query",
-            },
-        )
+        {
+            "habits": [
+                {
+                    "id": 1,
+                    "name": "Drink water",
+                    "frequency": HabitFrequency.DAILY,
+                    "type": HabitType.ABOVE,
+                    "target_value": 8,
+                    "start_date": date(2025, 8, 1),
+                },
+                {
+                    "id": 2,
+                    "name": "Go for a run",
+                    "frequency": HabitFrequency.WEEKLY,
+                    "type": HabitType.ABOVE,
+                    "target_value": 1,
+                    "start_date": date(2025, 8, 1),
+                },
+            ],
+            "path": "app.utils.Habit.query",
+        }
     ],
     indirect=True,
 )
-def test_get_stats(client, mock_habits, mock_progress_entries, monkeypatch, test_auth_headers):
+def test_get_stats(client, mock_habits, monkeypatch, test_auth_headers):
+    period_totals = {
+        1: [MockProgressEntry(date=date(2025, 8, 9), value=8, habit_id=1)],
+        2: [MockProgressEntry(date=date(2025, 8, 4), value=1, habit_id=2)],
+    }
+    monkeypatch.setattr("app.aggregates.load_period_totals", lambda habit_ids: period_totals)
     # Mock calculate_streak to return a predictable value
-    monkeypatch.setattr("app.routes.stats.calculate_streak", lambda habit, entries: 99)
+    monkeypatch.setattr("app.aggregates.calculate_streak", lambda habit, entries: 99)
 
     res = client.get("/api/stats", headers=test_auth_headers)
 
@@ -225,6 +223,7 @@ def test_get_stats(client, mock_habits, mock_progress_entries, monkeypatch, test
     data = res.get_json()
     assert data["success"] is True
     assert data["data"] == {"1": 99, "2": 99}
+    assert data["best_streaks"] == {"1": 99, "2": 99}
 
 
 def test_get_stats_without_habits(client, test_auth_headers):
@@ -234,6 +233,35 @@ def test_get_stats_without_habits(client, test_auth_headers):
     data = res.get_json()
     assert data["success"] is True
     assert data["data"] == {}
+    assert data["best_streaks"] == {}
+
+
+def test_get_stats_best_streak(client, test_user, test_auth_headers):
+    """Best streak is calculated once, stored, and reported next to the current one."""
+    today = date.today()
+    habit = Habit(
+        name="Meditate",
+        type=HabitType.ABOVE,
+        target_value=1,
+        frequency=HabitFrequency.DAILY,
+        start_date=today - timedelta(days=10),
+        user_id=test_user.id,
+    )
+    db.session.add(habit)
+    db.session.commit()
+    # Three-day run, a gap, then a two-day run up to yesterday
+    for days_ago in (8, 7, 6, 2, 1):
+        db.session.add(ProgressEntry(habit_id=habit.id, date=today - timedelta(days=days_ago), value=1))
+    rebuild_period_totals(habit)
+    habit.best_streak = None
+    db.session.commit()
+
+    res = client.get("/api/stats", headers=test_auth_headers)
+
+    data = res.get_json()
+    assert data["data"] == {str(habit.id): 2}
+    assert data["best_streaks"] == {str(habit.id): 3}
+    assert db.session.get(Habit, habit.id).best_streak == 3
 
 
 # Tests for filter_progress_to_current_period
@@ -372,3 +400,180 @@ def test_filter_progress_to_current_period_exclusive_end_date():
 
     assert len(result[1]) == 1
     assert result[1][0].date == date(2025, 8, 10)
+
+
+def test_get_stats_warm_cache_skips_history(client, test_habits, test_auth_headers, monkeypatch):
+    """When every habit's streak is cached, no progress history is queried."""
+    from sqlalchemy import event
+    from app.streaks import build_streak_state
+
+    habits = [h for h in test_habits if h.name != "Read"]
+    for habit in habits:
+        habit.best_streak = 4
+    db.session.commit()
+    cached = {habit.id: build_streak_state(habit, 2, 0).to_dict() for habit in habits}
+    monkeypatch.setattr("app.aggregates.get_cached_streaks", lambda ids: {i: cached[i] for i in ids})
+
+    statements = []
+    engine = db.engine
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        res = client.get("/api/stats", headers=test_auth_headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert res.get_json()["data"] == {str(habit.id): 2 for habit in habits}
+    assert res.get_json()["best_streaks"] == {str(habit.id): 4 for habit in habits}
+    assert any("FROM habit" in s for s in statements)
+    assert not [s for s in statements if "progress_entry" in s or "habit_period_total" in s]
+
+
+def test_get_completion(client, test_habits, test_auth_headers):
+    habit = test_habits[0]  # Daily, target 1
+    today = date.today()
+    habit.start_date = today - timedelta(days=4)
+    db.session.commit()
+    for days_ago in (3, 2, 10):  # The last one is before the start date
+        client.post(
+            "/api/progress",
+            json={"habit_id": habit.id, "date": (today - timedelta(days=days_ago)).isoformat(), "value": 1},
+            headers=test_auth_headers,
+        )
+
+    res = client.get("/api/stats/completion", headers=test_auth_headers)
+    data = res.get_json()["data"]
+
+    # The unfinished present day is left out until it succeeds
+    assert res.status_code == 200
+    assert data[str(habit.id)] == {"successful_periods": 2, "total_periods": 4, "percentage": 50.0}
+    assert str(test_habits[2].id) not in data
+
+    client.post(
+        "/api/progress",
+        json={"habit_id": habit.id, "date": today.isoformat(), "value": 1},
+        headers=test_auth_headers,
+    )
+    data = client.get("/api/stats/completion", headers=test_auth_headers).get_json()["data"]
+    assert data[str(habit.id)] == {"successful_periods": 3, "total_periods": 5, "percentage": 60.0}
+
+
+def test_load_completion_rates_below_counts_empty_periods(app, test_user):
+    habit = Habit(
+        name="No Sweets",
+        type=HabitType.BELOW,
+        target_value=1,
+        frequency=HabitFrequency.WEEKLY,
+        start_date=date(2024, 4, 3),
+        user_id=test_user.id,
+    )
+    db.session.add(habit)
+    db.session.commit()
+    db.session.add_all([
+        ProgressEntry(habit_id=habit.id, date=date(2024, 4, 10), value=3),  # Failed week
+        ProgressEntry(habit_id=habit.id, date=date(2024, 4, 18), value=1),
+        ProgressEntry(habit_id=habit.id, date=date(2024, 5, 7), value=2),  # Present week, failing
+    ])
+    rebuild_period_totals(habit)
+    db.session.commit()
+
+    # Weeks of Apr 1 to Apr 29 have ended; one of the five failed
+    rates = load_completion_rates([habit], reference_date=date(2024, 5, 8))
+
+    assert rates[habit.id] == {"successful_periods": 4, "total_periods": 5, "percentage": 80.0}
+
+
+def test_load_completion_rates_future_start(app, test_habits):
+    habit = test_habits[0]
+    habit.start_date = date.today() + timedelta(days=5)
+    db.session.commit()
+
+    rates = load_completion_rates([habit])
+
+    assert rates[habit.id] == {"successful_periods": 0, "total_periods": 0, "percentage": 0.0}
+
+
+def test_get_trends_groups_in_database(client, test_habits, test_auth_headers):
+    habit = test_habits[1]  # Weekly, target 30
+    for day, value in [("2024-05-06", 20), ("2024-05-09", 15), ("2024-05-20", 5)]:
+        client.post(
+            "/api/progress",
+            json={"habit_id": habit.id, "date": day, "value": value},
+            headers=test_auth_headers,
+        )
+
+    res = client.get(
+        f"/api/stats/trends?habit_id={habit.id}&from=2024-05-08&to=2024-05-21",
+        headers=test_auth_headers,
+    )
+    data = res.get_json()["data"]
+
+    # Buckets cover whole weeks and weeks without entries are filled in
+    assert res.status_code == 200
+    assert data["group_by"] == "week"
+    assert data["downsampled"] is False
+    assert data["period_starts"] == ["2024-05-06", "2024-05-13", "2024-05-20"]
+    assert data["totals"] == [35, 0, 5]
+    assert data["success"] == [True, False, False]
+
+    res = client.get(
+        f"/api/stats/trends?habit_id={habit.id}&group_by=month&from=2024-05-01&to=2024-06-30",
+        headers=test_auth_headers,
+    )
+    data = res.get_json()["data"]
+    assert data["period_starts"] == ["2024-05-01", "2024-06-01"]
+    assert data["totals"] == [40, 0]
+    assert data["success"] is None
+
+
+def test_get_trends_downsamples_to_point_budget(app, client, test_habits, test_auth_headers):
+    app.config["TRENDS_MAX_POINTS"] = 10
+    habit = test_habits[0]
+
+    res = client.get(
+        f"/api/stats/trends?habit_id={habit.id}&group_by=day&from=2024-01-01&to=2024-03-31",
+        headers=test_auth_headers,
+    )
+    data = res.get_json()["data"]
+
+    # 91 days and 14 weeks are over budget; three months fit
+    assert data["group_by"] == "month"
+    assert data["downsampled"] is True
+    assert data["period_starts"] == ["2024-01-01", "2024-02-01", "2024-03-01"]
+
+
+@pytest.mark.parametrize(
+    "query, status",
+    [
+        ("", 400),
+        ("&group_by=hour", 400),
+        ("&from=2024-13-01", 400),
+        ("&from=2024-05-02&to=2024-05-01", 400),
+        # Over the point budget even by year
+        ("&group_by=year&from=0001-01-01", 400),
+    ],
+)
+def test_get_trends_invalid_parameters(client, test_habits, test_auth_headers, query, status):
+    habit_param = f"habit_id={test_habits[0].id}" if query else ""
+    res = client.get(f"/api/stats/trends?{habit_param}{query}", headers=test_auth_headers)
+
+    assert res.status_code == status
+    assert res.get_json()["success"] is False
+
+
+def test_get_trends_clamps_end_to_today(client, test_habits, test_auth_headers):
+    habit = test_habits[0]
+
+    res = client.get(
+        f"/api/stats/trends?habit_id={habit.id}&group_by=year&to=9999-12-31",
+        headers=test_auth_headers,
+    )
+
+    assert res.status_code == 200
+    assert res.get_json()["data"]["period_starts"][-1] == date(date.today().year, 1, 1).isoformat()
+
+
+def test_get_trends_other_users_habit(client, test_habits, test_auth_headers):
+    res = client.get(f"/api/stats/trends?habit_id={test_habits[2].id}", headers=test_auth_headers)
+
+    assert res.status_code == 404
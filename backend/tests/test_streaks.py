@@ -0,0 +1,274 @@
+import random
+import pytest
+from datetime import date, datetime, timedelta
+
+from app.enums import HabitFrequency, HabitType
+from app.periods import (
+    PeriodCalendar,
+    get_calendar,
+    ordinal_to_period_start,
+    period_ordinal,
+    seconds_until_next_period,
+)
+from app.streaks import (
+    StreakState,
+    advance_streak_state,
+    apply_period_total,
+    build_streak_state,
+    calculate_best_streak,
+    calculate_streak_ordinal,
+    sum_by_period,
+)
+from app.utils import calculate_streak, calculate_streak_walk, get_date_range
+from tests.mocks import MockHabit, MockProgressEntry
+
+
+@pytest.mark.parametrize("frequency", list(HabitFrequency))
+def test_period_ordinal_matches_date_range(frequency):
+    """Consecutive periods have consecutive ordinals and round-trip to their start."""
+    day = date(2023, 12, 25)
+    for _ in range(800):
+        start, end = get_date_range(day, frequency)
+        ordinal = period_ordinal(day, frequency)
+
+        assert ordinal_to_period_start(ordinal, frequency) == start
+        assert period_ordinal(end, frequency) == ordinal + 1
+        day += timedelta(days=1)
+
+
+@pytest.mark.parametrize("frequency", list(HabitFrequency))
+def test_period_calendar_navigation(frequency):
+    calendar = PeriodCalendar(frequency)
+    start = calendar.period_start(date(2024, 2, 29))
+
+    assert calendar.previous_start(calendar.next_start(start)) == start
+    assert calendar.ordinal(calendar.next_start(start)) == calendar.ordinal(start) + 1
+    assert calendar.start_of_ordinal(calendar.ordinal(start)) == start
+
+
+def test_period_calendar_memoizes_lookups():
+    calendar = PeriodCalendar(HabitFrequency.WEEKLY, cache_size=16)
+    day = date(2024, 5, 8)
+
+    for _ in range(3):
+        assert calendar.period_range(day) == get_date_range(day, HabitFrequency.WEEKLY)
+
+    info = calendar.cache_info()["period_range"]
+    assert info["misses"] == 1
+    assert info["hits"] == 2
+
+
+def test_get_calendar_is_shared():
+    assert get_calendar(HabitFrequency.DAILY) is get_calendar(HabitFrequency.DAILY)
+    with pytest.raises(ValueError):
+        get_calendar("hourly")
+
+
+def test_seconds_until_next_period_picks_earliest_boundary():
+    now = datetime(2024, 5, 31, 23, 0)  # Friday, last day of May
+
+    assert seconds_until_next_period([HabitFrequency.YEARLY, HabitFrequency.MONTHLY], now) == 3600
+    assert seconds_until_next_period([HabitFrequency.WEEKLY], now) == 2 * 86400 + 3600
+    with pytest.raises(ValueError):
+        seconds_until_next_period([], now)
+
+
+def _random_history(rng, habit, today, years):
+    entries = []
+    day = today - timedelta(days=365 * years)
+    while day <= today:
+        if rng.random() < 0.6:
+            entries.append(MockProgressEntry(day, rng.choice([0, 1, 2, 3, 5, 8])))
+        day += timedelta(days=1)
+    entries.reverse()
+    return entries
+
+
+@pytest.mark.parametrize("frequency", list(HabitFrequency))
+@pytest.mark.parametrize("habit_type", list(HabitType))
+@pytest.mark.parametrize("target_value", [0, 1, 3, 20])
+def test_ordinal_engine_matches_walk(frequency, habit_type, target_value):
+    """The ordinal engine gives the same streak as the period walk."""
+    rng = random.Random(f"{frequency}-{habit_type}-{target_value}")
+    today = date.today()
+
+    for _ in range(5):
+        habit = MockHabit(
+            frequency,
+            habit_type,
+            target_value=target_value,
+            start_date=today - timedelta(days=rng.randint(0, 365 * 3)),
+        )
+        entries = _random_history(rng, habit, today, years=4)
+
+        assert calculate_streak_ordinal(habit, entries) == calculate_streak_walk(habit, entries)
+
+
+def test_ordinal_engine_long_below_streak():
+    """A BELOW habit without failures counts every period back to the start date."""
+    today = date.today()
+    habit = MockHabit(
+        HabitFrequency.DAILY,
+        HabitType.BELOW,
+        target_value=2,
+        start_date=today - timedelta(days=3999),
+    )
+
+    assert calculate_streak_ordinal(habit, []) == 4000
+
+
+def test_ordinal_engine_start_date_in_future():
+    habit = MockHabit(
+        HabitFrequency.DAILY,
+        HabitType.BELOW,
+        target_value=2,
+        start_date=date.today() + timedelta(days=3),
+    )
+
+    assert calculate_streak_ordinal(habit, []) == 0
+
+
+def test_calculate_streak_engine_selection(app):
+    """The engine comes from the STREAK_ENGINE config unless given explicitly."""
+    habit = MockHabit(
+        HabitFrequency.DAILY,
+        HabitType.BELOW,
+        target_value=0,
+        start_date=date.today() - timedelta(days=2),
+    )
+
+    with app.app_context():
+        app.config["STREAK_ENGINE"] = "walk"
+        assert calculate_streak(habit, []) == 3
+
+        app.config["STREAK_ENGINE"] = "unknown"
+        with pytest.raises(ValueError):
+            calculate_streak(habit, [])
+
+    assert calculate_streak(habit, [], engine="ordinal") == 3
+
+
+def test_best_streak_above_picks_longest_run():
+    today = date.today()
+    habit = MockHabit(
+        HabitFrequency.DAILY,
+        HabitType.ABOVE,
+        target_value=1,
+        start_date=today - timedelta(days=20),
+    )
+    entries = [
+        MockProgressEntry(today - timedelta(days=days_ago), 1)
+        for days_ago in (15, 14, 13, 12, 9, 1, 0)
+    ]
+
+    assert calculate_best_streak(habit, sum_by_period(habit, entries)) == 4
+
+
+def test_best_streak_below_counts_empty_periods():
+    today = date.today()
+    habit = MockHabit(
+        HabitFrequency.DAILY,
+        HabitType.BELOW,
+        target_value=1,
+        start_date=today - timedelta(days=20),
+    )
+    # Failures 15 and 3 days ago split the history into runs of 5, 11 and 3 days
+    entries = [
+        MockProgressEntry(today - timedelta(days=15), 2),
+        MockProgressEntry(today - timedelta(days=3), 2),
+    ]
+
+    assert calculate_best_streak(habit, sum_by_period(habit, entries)) == 11
+
+
+@pytest.mark.parametrize("frequency", list(HabitFrequency))
+@pytest.mark.parametrize("habit_type", list(HabitType))
+def test_best_streak_never_below_current_streak(frequency, habit_type):
+    rng = random.Random(f"best-{frequency}-{habit_type}")
+    today = date.today()
+
+    for _ in range(5):
+        habit = MockHabit(
+            frequency,
+            habit_type,
+            target_value=rng.choice([1, 3]),
+            start_date=today - timedelta(days=rng.randint(0, 365 * 3)),
+        )
+        entries = _random_history(rng, habit, today, years=4)
+        best = calculate_best_streak(habit, sum_by_period(habit, entries))
+
+        assert best >= calculate_streak_ordinal(habit, entries)
+
+
+def _state_for(habit, entries):
+    totals = sum_by_period(habit, entries)
+    present = period_ordinal(date.today(), habit.frequency)
+    return build_streak_state(habit, calculate_streak_walk(habit, entries), totals.get(present, 0))
+
+
+def test_streak_state_records_break_period():
+    today = date.today()
+    habit = MockHabit(HabitFrequency.DAILY, HabitType.ABOVE, target_value=1, start_date=today - timedelta(days=10))
+    entries = [MockProgressEntry(today - timedelta(days=d), 1) for d in (0, 1, 2, 5)]
+
+    state = _state_for(habit, entries)
+
+    assert state.streak == 3
+    assert state.anchor == today
+    assert state.current_total == 1
+    assert state.previous_success is True
+    assert state.break_period == today - timedelta(days=3)
+    assert StreakState.from_dict(state.to_dict()) == state
+
+
+def test_apply_period_total_updates_present_period():
+    today = date.today()
+    habit = MockHabit(HabitFrequency.DAILY, HabitType.ABOVE, target_value=2, start_date=today - timedelta(days=10))
+    entries = [MockProgressEntry(today - timedelta(days=d), 2) for d in (1, 2)]
+    state = _state_for(habit, entries)
+    assert state.streak == 2
+
+    state = apply_period_total(habit, state, today, 2)
+    assert state.streak == 3
+
+    state = apply_period_total(habit, state, today, 1)
+    assert state.streak == 2
+    assert state.current_total == 1
+
+
+def test_apply_period_total_back_dated_changes():
+    today = date.today()
+    habit = MockHabit(HabitFrequency.DAILY, HabitType.BELOW, target_value=1, start_date=today - timedelta(days=30))
+    # Failure 10 days ago; 9 successful days since
+    entries = [MockProgressEntry(today - timedelta(days=10), 5)]
+    state = _state_for(habit, entries)
+    assert state.break_period == today - timedelta(days=10)
+
+    # Older than the break: no effect on the current streak
+    assert apply_period_total(habit, state, today - timedelta(days=15), 3) == state
+    # Inside the counted run or at the break: needs a recalculation
+    assert apply_period_total(habit, state, today - timedelta(days=4), 3) is None
+    assert apply_period_total(habit, state, today - timedelta(days=10), 0) is None
+
+
+@pytest.mark.parametrize("habit_type", list(HabitType))
+@pytest.mark.parametrize("current_total", [0, 1, 5])
+@pytest.mark.parametrize("days_elapsed", [1, 3])
+def test_advance_streak_state_matches_recalculation(habit_type, current_total, days_elapsed):
+    today = date.today()
+    then = today - timedelta(days=days_elapsed)
+    habit = MockHabit(HabitFrequency.DAILY, habit_type, target_value=1, start_date=today - timedelta(days=20))
+    entries = [MockProgressEntry(then - timedelta(days=d), 1) for d in (1, 2, 3)]
+    if current_total:
+        entries.append(MockProgressEntry(then, current_total))
+
+    # Streak as it was on the earlier day: the run before it plus that day if it succeeded
+    run_before = 3 if habit_type == HabitType.ABOVE else 20 - days_elapsed
+    then_success = (current_total >= 1) if habit_type == HabitType.ABOVE else (current_total <= 1)
+    old_state = build_streak_state(habit, run_before + then_success, current_total, today=then)
+
+    advanced = advance_streak_state(habit, old_state)
+
+    expected_streak = calculate_streak_walk(habit, entries)
+    assert advanced.streak == expected_streak
+    assert advanced == build_streak_state(habit, expected_streak, 0)
@@ -24,7 +24,7 @@ const Dashboard: React.FC = () => {
 	const [habitToAddProgressTo, setHabitToAddProgressTo] = useState<Habit | null>(null);
 
 	useEffect(() => {
-		Promise.all([reloadHabits(), reloadProgress(), reloadStats()])
+		reloadDashboard()
 			.then(() => {
 				setError(null);
 			})
@@ -37,40 +37,14 @@ const Dashboard: React.FC = () => {
 			});
 	}, []);
 
-	const reloadHabits = async () => {
-		return api
-			.get("/habits")
-			.then((response) => {
-				setHabits(response.data.data);
-			})
-			.catch((err) => {
-				console.error("Failed to load habits", err);
-				throw err;
-			});
-	};
-
-	const reloadProgress = async () => {
-		return api
-			.get("/progress")
-			.then((response) => {
-				setProgress(response.data.data);
-			})
-			.catch((err) => {
-				setError("Failed to load progress");
-				throw err;
-			});
-	};
-
-	const reloadStats = async () => {
-		return api
-			.get("/stats")
-			.then((response) => {
-				setStats(new Map(Object.entries(response.data.data)));
-			})
-			.catch((err) => {
-				setError("Failed to load stats");
-				throw err;
-			});
+	// Habits, current-period progress and streaks in a single request
+	const reloadDashboard = async () => {
+		return api.get("/dashboard").then((response) => {
+			const data = response.data.data;
+			setHabits(data.habits);
+			setProgress(data.progress);
+			setStats(new Map(Object.entries(data.streaks)));
+		});
 	};
 
 	const handleAddHabit = async (
@@ -134,10 +108,8 @@ const Dashboard: React.FC = () => {
 			// Add new progress entry to local state from response
 			setProgress((prevProgress) => [...prevProgress, response.data.data]);
 			setHabitToAddProgressTo(null);
-			// Still need to reload habits (for is_completed) and stats (for streaks)
-			// as these are calculated server-side
-			reloadHabits();
-			reloadStats();
+			// Reload is_completed, current_total and streaks, which are calculated server-side
+			reloadDashboard();
 		} catch (error) {
 			console.error("Error adding progress to habit:", error);
 		}
@@ -19,7 +19,10 @@ const HabitCard: React.FC<HabitCardProps> = ({ habit, progress, stats }) => {
 	};
 
 	const getProgress = () => {
-		// TODO: getProgress is called multiple times. Could cache the result somewhere.
+		// Current-period total is summed by the backend
+		if (habit.current_total !== undefined) {
+			return habit.current_total;
+		}
 		let totalValue = 0;
 		for (let prog of progress) {
 			totalValue += prog.value;
@@ -1,4 +1,4 @@
-import React, { createContext, useContext, useState, useEffect } from "react";
+import React, { createContext, useContext, useState, useEffect, useRef } from "react";
 import { useNavigate } from "react-router-dom";
 import api from "../api/axios";
 
@@ -7,9 +7,12 @@ interface AuthContextType {
 	logout: () => void;
 	checkAuth: () => Promise<boolean>;
 	isLoading: boolean;
-	login: (token: string, rememberMe: boolean) => void;
+	login: (token: string, refreshToken: string, rememberMe: boolean) => void;
 }
 
+// Requests that must not trigger a token refresh when they fail with 401
+const NO_REFRESH_URLS = ["/auth/login", "/auth/signup", "/auth/refresh", "/auth/logout"];
+
 const AuthContext = createContext<AuthContextType | null>(null);
 
 export const useAuth = () => {
@@ -24,6 +27,8 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
 	const [isAuthenticated, setIsAuthenticated] = useState(false);
 	const [isLoading, setIsLoading] = useState(true);
 	const navigate = useNavigate();
+	// Shared by concurrent 401s so only one refresh request is sent
+	const refreshPromise = useRef<Promise<string | null> | null>(null);
 
 	const getStorage = () => {
 		// Check if token exists in localStorage first, then sessionStorage
@@ -32,13 +37,41 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
 		return sessionStorage;
 	};
 
-	const login = (token: string, rememberMe: boolean) => {
-		const storage = rememberMe ? localStorage : sessionStorage;
+	const storeTokens = (storage: Storage, token: string, refreshToken: string) => {
 		storage.setItem("token", token);
+		storage.setItem("refreshToken", refreshToken);
 		api.defaults.headers.common["Authorization"] = `Bearer ${token}`;
+	};
+
+	const login = (token: string, refreshToken: string, rememberMe: boolean) => {
+		const storage = rememberMe ? localStorage : sessionStorage;
+		storeTokens(storage, token, refreshToken);
 		setIsAuthenticated(true);
 	};
 
+	// Exchange the stored refresh token for a new access token; null if that fails
+	const refreshAccessToken = () => {
+		if (!refreshPromise.current) {
+			refreshPromise.current = (async () => {
+				const storage = getStorage();
+				const refreshToken = storage.getItem("refreshToken");
+				if (!refreshToken) return null;
+
+				try {
+					const response = await api.post("/auth/refresh", { refresh_token: refreshToken });
+					const { token, refresh_token } = response.data.data;
+					storeTokens(storage, token, refresh_token);
+					return token as string;
+				} catch (err) {
+					return null;
+				}
+			})().finally(() => {
+				refreshPromise.current = null;
+			});
+		}
+		return refreshPromise.current;
+	};
+
 	const checkAuth = async () => {
 		const storage = getStorage();
 		const token = storage.getItem("token");
@@ -62,13 +95,53 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
 	};
 
 	const logout = () => {
+		// Revoke the refresh token on the server; the session ends locally either way
+		const refreshToken = getStorage().getItem("refreshToken");
+		if (refreshToken) {
+			api.post("/auth/logout", { refresh_token: refreshToken }).catch(() => {});
+		}
 		localStorage.removeItem("token");
+		localStorage.removeItem("refreshToken");
 		sessionStorage.removeItem("token");
+		sessionStorage.removeItem("refreshToken");
 		delete api.defaults.headers.common["Authorization"];
 		setIsAuthenticated(false);
 		navigate("/login");
 	};
 
+	// Set up an interceptor to handle 401 responses: renew the access token
+	// once and retry, and log out if that is not possible. Registered before
+	// the initial /auth/verify so an expired access token is renewed on reload.
+	useEffect(() => {
+		const interceptor = api.interceptors.response.use(
+			(response) => response,
+			async (error) => {
+				const original = error.config;
+				if (
+					error.response?.status === 401 &&
+					original &&
+					!original._retry &&
+					!NO_REFRESH_URLS.includes(original.url)
+				) {
+					original._retry = true;
+					const token = await refreshAccessToken();
+					if (token) {
+						original.headers["Authorization"] = `Bearer ${token}`;
+						return api(original);
+					}
+				}
+				if (error.response?.status === 401) {
+					logout();
+				}
+				return Promise.reject(error);
+			}
+		);
+
+		return () => {
+			api.interceptors.response.eject(interceptor);
+		};
+	}, []);
+
 	useEffect(() => {
 		const initializeAuth = async () => {
 			try {
@@ -88,23 +161,6 @@ export const AuthProvider: React.FC<{ children: React.ReactNode }> = ({ children
 		initializeAuth();
 	}, []);
 
-	// Set up an interceptor to handle 401 responses
-	useEffect(() => {
-		const interceptor = api.interceptors.response.use(
-			(response) => response,
-			(error) => {
-				if (error.response?.status === 401) {
-					logout();
-				}
-				return Promise.reject(error);
-			}
-		);
-
-		return () => {
-			api.interceptors.response.eject(interceptor);
-		};
-	}, []);
-
 	if (isLoading) {
 		return <div>Loading...</div>;
 	}
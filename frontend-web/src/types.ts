@@ -6,6 +6,7 @@ export interface Habit {
 	target: number;
 	unit?: string;
 	is_completed?: boolean;
+	current_total?: number;
 	created_at: string;
 	updated_at: string;
 }